@@ -13,17 +13,106 @@
 Imports the Bounce demo and executes the main function.
 """
 
-import sys
-from game import game
+import argparse
+from game.stats import startup_profile
 
-if __name__ == "__main__":
-    NUM_BALLS = 5
-    if len(sys.argv) > 1:
-        NUM_BALLS = int(sys.argv[1])
-    if NUM_BALLS >= 50:
-        NUM_BALLS = 49
-    if NUM_BALLS < 3:
-        NUM_BALLS = 3
-    video_game = game.BounceDemo(NUM_BALLS)
+
+def main():
+    """Parse the command line and run the demo."""
+    parser = argparse.ArgumentParser(description="Bounce with pygame!")
+    parser.add_argument(
+        "num_balls",
+        nargs="?",
+        type=int,
+        default=5,
+        help="number of balls, from 3 to 49 (default 5)",
+    )
+    parser.add_argument(
+        "--stress",
+        metavar="NUM_BALLS",
+        type=int,
+        help="run the scalable engine with any number of balls and print "
+        "steps per second and frame time percentiles on exit",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="in stress mode, step the arena in tiles on this many "
+        "processes (default 1)",
+    )
+    parser.add_argument(
+        "--world",
+        metavar=("WIDTH", "HEIGHT"),
+        nargs=2,
+        type=int,
+        help="in stress mode, bounce the balls in a world of this size; "
+        "pan with the arrow keys and zoom with +, - or the mouse wheel",
+    )
+    parser.add_argument(
+        "--headless",
+        metavar="TICKS",
+        type=int,
+        help="without a display or sound, step the balls this many times "
+        "as fast as possible and print statistics",
+    )
+    parser.add_argument(
+        "--render-every",
+        metavar="N",
+        type=int,
+        default=0,
+        help="in headless mode, draw every Nth step offscreen "
+        "(default 0, never draw)",
+    )
+    parser.add_argument(
+        "--pipelined",
+        action="store_true",
+        help="step the balls on a second thread while the last step is "
+        "drawn",
+    )
+    parser.add_argument(
+        "--startup-profile",
+        action="store_true",
+        help="print how long importing, opening the window, loading fonts, "
+        "sounds and images and drawing the first frame took",
+    )
+    parser.add_argument(
+        "--count-allocations",
+        action="store_true",
+        help="trace the memory the ball methods allocate every frame and "
+        "print a summary when the balls scene ends",
+    )
+    args = parser.parse_args()
+    # Imported here so the profile can time it; pygame and NumPy are most
+    # of the time spent before the window opens.
+    with startup_profile.phase("imports"):
+        from game import game  # pylint: disable=import-outside-toplevel
+    headless = args.headless is not None
+    if args.stress:
+        video_game = game.BounceDemo(
+            max(3, args.stress),
+            stress=True,
+            processes=args.processes,
+            world_size=args.world,
+            headless=headless,
+            pipelined=args.pipelined,
+            profile_startup=args.startup_profile,
+        )
+    else:
+        num_balls = min(max(args.num_balls, 3), 49)
+        video_game = game.BounceDemo(
+            num_balls,
+            headless=headless,
+            pipelined=args.pipelined,
+            profile_startup=args.startup_profile,
+            count_allocations=args.count_allocations,
+        )
+    if headless:
+        video_game.simulate_balls(args.headless, args.render_every)
+        return
     video_game.build_scene_graph()
     video_game.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -10,4 +10,18 @@
 #
 """Init file for the boxes PyGame demo."""
 
-__all__ = ["game", "rgbcolors", "scene"]
+__all__ = [
+    "assets",
+    "audio",
+    "broadphase",
+    "camera",
+    "game",
+    "parallel",
+    "raster",
+    "rgbcolors",
+    "scene",
+    "sprites",
+    "stats",
+    "text",
+    "world",
+]
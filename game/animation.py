@@ -13,6 +13,7 @@
 
 import os.path
 import pygame
+from game import assets
 
 # Adapted aliens.py in pygame/examples
 # https://github.com/pygame/pygame/blob/main/examples/aliens.py
@@ -27,24 +28,24 @@ class Explosion(pygame.sprite.Sprite):
     # GIF or a sprite sheet.
     image_path = os.path.join(data_dir, 'explosion1.gif')
 
+    asset_key = 'explosion'
+
     defaultlife = 12
     animcycle = 3
-    images = []
 
-    def __init__(self, actor):
+    @staticmethod
+    def preload():
+        """Load the explosion frames before the game loop starts."""
+        assets.load_animation(Explosion.asset_key, Explosion.image_path)
+
+    def __init__(self, actor, center=None):
+        """Explode over the actor, or at center if one is given."""
         pygame.sprite.Sprite.__init__(self, self.containers)
-        try:
-            surface = pygame.image.load(Explosion.image_path)
-        except pygame.error as pygame_error:
-            raise SystemExit(
-                f'Could not load image "{Explosion.image_path}" \
-                    {pygame.get_error()}'
-            ) from pygame_error
-        img = surface.convert()
-        if not Explosion.images:
-            Explosion.images = [img, pygame.transform.flip(img, 1, 1)]
+        self.images = assets.frames(Explosion.asset_key)
         self.image = self.images[0]
-        self.rect = self.image.get_rect(center=actor.center)
+        self.rect = self.image.get_rect(
+            center=center if center is not None else actor.center
+        )
         self.life = Explosion.defaultlife
 
     def update(self):
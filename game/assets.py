@@ -0,0 +1,95 @@
+# Moses Merugu
+# CPSC 386-03
+# 2022-05-09
+# mmeru@csu.fullerton.edu
+# @mmeru
+#
+# Lab 04-00
+#
+# Bounce with pygame!
+#
+"""Images loaded once and served by key.
+
+Loading an image reads and decodes a file, and converting it to the display
+format copies every pixel, so both are done once, before the game loop, and
+the sprites made during the game only look their images up by key. Every
+asset is a tuple of frames; a still image is one frame."""
+
+import pygame
+from game.stats import startup_profile
+
+
+class AssetManager:
+    """Preload images in the display format and hand out their frames."""
+
+    def __init__(self):
+        """Initialize an empty asset manager."""
+        self._frames = {}
+
+    def __contains__(self, key):
+        """Return True if an asset was loaded under key."""
+        return key in self._frames
+
+    @staticmethod
+    def _load(path):
+        """Load the image at path converted to the display format."""
+        with startup_profile.phase('images'):
+            try:
+                surface = pygame.image.load(path)
+            except pygame.error as pygame_error:
+                raise SystemExit(
+                    f'Could not load image "{path}" {pygame.get_error()}'
+                ) from pygame_error
+            return surface.convert()
+
+    def load_image(self, key, path):
+        """Load the image at path as a single frame under key, unless \
+            key is loaded already."""
+        if key not in self._frames:
+            self._frames[key] = (AssetManager._load(path),)
+
+    def load_animation(self, key, path):
+        """Load the image at path under key with a second frame flipped \
+            on both axes, unless key is loaded already."""
+        if key not in self._frames:
+            image = AssetManager._load(path)
+            self._frames[key] = (
+                image,
+                pygame.transform.flip(image, True, True),
+            )
+
+    def frames(self, key):
+        """Return the frames loaded under key."""
+        try:
+            return self._frames[key]
+        except KeyError as key_error:
+            raise KeyError(
+                f'The asset "{key}" was never loaded'
+            ) from key_error
+
+    def image(self, key):
+        """Return the first frame loaded under key."""
+        return self.frames(key)[0]
+
+
+_assets = AssetManager()
+
+
+def load_image(key, path):
+    """Preload the image at path into the shared asset manager."""
+    _assets.load_image(key, path)
+
+
+def load_animation(key, path):
+    """Preload the animation at path into the shared asset manager."""
+    _assets.load_animation(key, path)
+
+
+def frames(key):
+    """Return the frames of a preloaded shared asset."""
+    return _assets.frames(key)
+
+
+def image(key):
+    """Return the first frame of a preloaded shared asset."""
+    return _assets.image(key)
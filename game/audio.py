@@ -0,0 +1,155 @@
+# Moses Merugu
+# CPSC 386-03
+# 2022-05-09
+# mmeru@csu.fullerton.edu
+# @mmeru
+#
+# Lab 04-00
+#
+# Bounce with pygame!
+#
+"""Sound effects shared by every ball.
+
+Decoding a sound file turns the whole clip into PCM samples, so each file
+is decoded once and every ball plays the same Sound. Anything a ball wants
+to change about its sound, such as being muted, is kept in the ball. The
+balls ask a voice manager to play their sounds, which plays a bounded
+number of them each frame."""
+
+from math import cos, pi, sin
+import threading
+import pygame
+from game.stats import startup_profile
+
+
+def init():
+    """Start the mixer unless it is running. It is started by the first \
+        sound or soundtrack loaded rather than with the game."""
+    if not pygame.mixer.get_init():
+        with startup_profile.phase('mixer'):
+            pygame.mixer.init()
+
+
+class SoundBank:
+    """Decode every sound file once and hand out the same Sound after."""
+
+    def __init__(self):
+        """Initialize an empty sound bank."""
+        self._sounds = {}
+
+    def __len__(self):
+        """Return the number of decoded sounds."""
+        return len(self._sounds)
+
+    def get(self, path):
+        """Return the Sound decoded from the file at path."""
+        sound = self._sounds.get(path)
+        if sound is None:
+            try:
+                init()
+                with startup_profile.phase('sounds'):
+                    sound = pygame.mixer.Sound(path)
+            except pygame.error as pygame_error:
+                print(f"Cannot open {path}")
+                raise SystemExit(1) from pygame_error
+            self._sounds[path] = sound
+        return sound
+
+
+_sounds = SoundBank()
+
+
+def sound(path):
+    """Return the shared Sound decoded from the file at path."""
+    return _sounds.get(path)
+
+
+class VoiceManager:
+    """Merge the sounds asked for during a frame and play a few of them.
+
+    Every collision asks for a sound, but in a crowded scene hundreds of
+    collisions a frame are heard as one. Requests for the same sound are
+    merged until flush, which plays at most max_plays of them on at most
+    max_voices channels reserved for the manager. The mixer work per frame
+    is bounded however many balls collide."""
+
+    def __init__(self, max_voices=8, max_plays=4):
+        """Initialize a manager playing at most max_plays sounds a frame \
+            on max_voices channels."""
+        self._max_voices = max_voices
+        self._max_plays = max_plays
+        self._channels = None
+        # Sound to [requests, sum of x, requests with an x]. A pipelined
+        # game asks for sounds on the simulation thread and flushes them
+        # on the drawing thread, so the dictionary is only touched under
+        # the lock.
+        self._requests = {}
+        self._lock = threading.Lock()
+
+    def request(self, sound, center_x=None):
+        """Ask for sound to be played, coming from center_x if given."""
+        with self._lock:
+            merged = self._requests.get(sound)
+            if merged is None:
+                merged = [0, 0.0, 0]
+                self._requests[sound] = merged
+            merged[0] += 1
+            if center_x is not None:
+                merged[1] += center_x
+                merged[2] += 1
+
+    def _free_channel(self):
+        """Return a reserved channel that is not playing, or None."""
+        if self._channels is None:
+            pygame.mixer.set_reserved(self._max_voices)
+            self._channels = [
+                pygame.mixer.Channel(channel)
+                for channel in range(self._max_voices)
+            ]
+        for channel in self._channels:
+            if not channel.get_busy():
+                return channel
+        return None
+
+    def flush(self, left=None, right=None):
+        """Play the sounds asked for since the last flush; return how \
+            many were played.
+
+        With left and right, the edges of what is in view, a sound is
+        panned by where it came from and fades with how far out of view it
+        was."""
+        with self._lock:
+            (requests, self._requests) = (self._requests, {})
+        if not requests or not pygame.mixer.get_init():
+            return 0
+        played = 0
+        loudest = sorted(requests.items(), key=lambda item: -item[1][0])
+        for sound, (_, sum_x, positions) in loudest[: self._max_plays]:
+            channel = self._free_channel()
+            if channel is None:
+                break
+            channel.play(sound)
+            if positions and left is not None:
+                width = max(right - left, 1.0)
+                where = (sum_x / positions - left) / width
+                outside = max(-where, where - 1.0, 0.0)
+                pan = min(max(where, 0.0), 1.0)
+                volume = 1.0 / (1.0 + outside)
+                channel.set_volume(
+                    volume * cos(pan * pi / 2), volume * sin(pan * pi / 2)
+                )
+            played += 1
+        return played
+
+
+_voices = VoiceManager()
+
+
+def play(sound, center_x=None):
+    """Ask the shared voice manager to play sound."""
+    _voices.request(sound, center_x)
+
+
+def flush(left=None, right=None):
+    """Play the sounds the shared voice manager was asked for."""
+    return _voices.flush(left, right)
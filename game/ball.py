@@ -12,11 +12,13 @@
 
 # from email.errors import ObsoleteHeaderDefect
 import os.path
+from math import hypot
 from random import randint
 
 # from math import isclose
 import pygame
-from game import rgbcolors
+from game import audio, rgbcolors, text
+from game.world import BallWorld
 
 
 def random_velocity(min_val=1, max_val=3):
@@ -33,74 +35,110 @@ def random_velocity(min_val=1, max_val=3):
 
 def random_color():
     """Return a random color."""
-    return pygame.Color(randint(0, 255), randint(0, 255), randint(0, 255))
+    return pygame.Color(*rgbcolors.random_colors(1)[0].tolist())
 
 
 # This is the class we discussed in class. You can have this as a standalone
 # definition of a circle's geometry or you can fold the Circle and Ball classes
 # together into a single class definition. Your choice.
 class Circle:
-    """Class representing a circle with a bounding rect."""
+    """Class representing a circle with a bounding rect.
 
-    def __init__(self, center_x, center_y, radius):
+    The circle's geometry is stored in a row of a BallWorld. A circle made
+    without a world gets a world of its own. The methods called every frame
+    work on that row in place and do not build new vectors or rects."""
 
-        self._center = pygame.Vector2(center_x, center_y)
-        self._radius = radius
+    __slots__ = ("_world", "_index", "_rect")
+
+    def __init__(self, center_x, center_y, radius, world=None):
+
+        if world is None:
+            world = BallWorld(capacity=1)
+        self._world = world
+        self._index = world.add(center_x, center_y, radius)
+        self._rect = pygame.Rect(0, 0, 0, 0)
+
+    @property
+    def world(self):
+        """Return the world holding the circle's geometry."""
+
+        return self._world
+
+    @property
+    def index(self):
+        """Return the circle's row in its world."""
+
+        return self._index
+
+    @property
+    def center_xy(self):
+        """Return the circle's center as an (x, y) tuple of floats."""
+
+        centers = self._world.centers
+        return (centers.item(self._index, 0), centers.item(self._index, 1))
 
     @property
     def radius(self):
         """Return the circle's radius"""
 
-        return self._radius
+        return self._world.radii[self._index].item()
 
     @property
     def center(self):
         """Return the circle's center."""
 
-        return self._center
+        return pygame.Vector2(*self.center_xy)
 
     @property
     def rect(self):
-        """Return bounding Rect; calculate it and create a new Rect instance"""
+        """Return bounding Rect; the same Rect is updated in place on every \
+            access so copy it to keep it."""
 
-        upper_left_corner = self._center - pygame.Vector2(
-            self._radius, -self._radius
+        (center_x, center_y) = self.center_xy
+        radius = self.radius
+        self._rect.update(
+            center_x - radius, center_y - radius, radius * 2, radius * 2
         )
-        width = self._radius * 2
-        return pygame.Rect(upper_left_corner, (width, width))
+        return self._rect
 
     @property
     def width(self):
         """Return the width of the bounding box the circle is in."""
 
-        return self._radius * 2
+        return self.radius * 2
 
     @property
     def height(self):
         """Return the height of the bounding box the circle is in."""
 
-        return self._radius * 2
+        return self.radius * 2
 
     def squared_distance_from(self, other_circle):
         """Squared distance from self to other circle."""
 
-        return (other_circle.center - self._center).squared_length()
+        (center_x, center_y) = self.center_xy
+        (other_x, other_y) = other_circle.center_xy
+        return (other_x - center_x) ** 2 + (other_y - center_y) ** 2
 
     def distance_from(self, other_circle):
         """Distance from self to other circle"""
 
-        return (other_circle.center - self._center).length()
+        (center_x, center_y) = self.center_xy
+        (other_x, other_y) = other_circle.center_xy
+        return hypot(other_x - center_x, other_y - center_y)
 
     def move_ip(self, x_coord, y_coord):
         """Move circle in place, update the circle's center"""
 
-        self._center = self._center + pygame.Vector2(x_coord, y_coord)
+        centers = self._world.centers
+        centers[self._index, 0] += x_coord
+        centers[self._index, 1] += y_coord
 
     def move(self, x_coord, y_coord):
         """Move circle, return a new Circle instance"""
 
-        center = self._center + pygame.Vector2(x_coord, y_coord)
-        return Circle(center[0], center[1], self._radius)
+        center = self.center + pygame.Vector2(x_coord, y_coord)
+        return Circle(center[0], center[1], self.radius)
 
     def stay_in_bounds(self, xmin, xmax, ymin, ymax):
         """Update the position of the \
@@ -111,6 +149,19 @@ class Circle:
 class Ball:
     """A class representing a moving ball."""
 
+    __slots__ = (
+        "_name",
+        "_circle",
+        "_world",
+        "_index",
+        "_sound_on",
+        "_bounce_sound_on",
+        "_draw_text",
+        "_name_text",
+        "_bounce_sound",
+        "_reflect_sound",
+    )
+
     default_radius = 25
 
     main_dir = os.path.split(os.path.abspath(__file__))[0]
@@ -122,113 +173,143 @@ class Ball:
     bounce_sound = os.path.join(data_dir, "Boing.aiff")
     reflect_sound = os.path.join(data_dir, "Monkey.aiff")
 
-    def __init__(self, name, center_x, center_y, sound_on=True):
+    def __init__(self, name, center_x, center_y, sound_on=True, world=None):
         """Initialize a bouncing ball."""
         # The name can be any string. The best choice is an integer.
         self._name = name
-        # Yes, we could define the details about our geometry in the Ball
-        # class or we can define the geometry in an instance variable.
-        # It is up to you if you want to separate them out or integrate them
-        # together.
-        self._circle = Circle(center_x, center_y, Ball.default_radius)
-        self._color = random_color()
-        self._velocity = random_velocity()
+        # The ball's state lives in a row of a BallWorld so the scene can
+        # update every ball at once; the ball is a view of that row.
+        self._circle = Circle(
+            center_x, center_y, Ball.default_radius, world=world
+        )
+        self._world = self._circle.world
+        self._index = self._circle.index
+        self._world.colors[self._index] = tuple(random_color())[:3]
+        self._world.velocities[self._index] = random_velocity()
+        self._world.bounce_counts[self._index] = randint(5, 10)
         self._sound_on = sound_on
-        self._bounce_count = randint(5, 10)
-        self._is_alive = True
         self._draw_text = False
-        font = pygame.font.SysFont(None, Ball.default_radius)
-        self._name_text = font.render(str(self._name), True, rgbcolors.black)
-        try:
-            self._bounce_sound = pygame.mixer.Sound(Ball.bounce_sound)
-            self._bounce_channel = pygame.mixer.Channel(2)
-        except pygame.error as pygame_error:
-            print(f"Cannot open {Ball.bounce_sound}")
-            raise SystemExit(1) from pygame_error
-        try:
-            self._reflect_sound = pygame.mixer.Sound(Ball.reflect_sound)
-            self._reflect_channel = pygame.mixer.Channel(3)
-        except pygame.error as pygame_error:
-            print(f"Cannot open {Ball.reflect_sound}")
-            raise SystemExit(1) from pygame_error
+        # Rendered from the shared text cache the first time it is shown.
+        self._name_text = None
+        # The sounds are decoded once and shared by every ball, so muting
+        # is kept in the ball rather than in the sound's volume.
+        self._bounce_sound_on = True
+        self._bounce_sound = audio.sound(Ball.bounce_sound)
+        self._reflect_sound = audio.sound(Ball.reflect_sound)
 
     def toggle_draw_text(self):
         """Toggle the debugging text where each circle's name is drawn."""
         self._draw_text = not self._draw_text
+        if self._draw_text and self._name_text is None:
+            self._name_text = text.render(
+                str(self._name), Ball.default_radius, rgbcolors.black
+            )
 
     def toggle_bounce_sound(self):
         """Toggle ball bounce sound"""
-        if self._bounce_sound.get_volume() > 0:
-            self._bounce_sound.set_volume(0)
-        else:
-            self._bounce_sound.set_volume(1)
-
-    def draw(self, surface):
-        """Draw the circle to the surface."""
-        pygame.draw.circle(surface, self.color, self.center, self.radius)
-        if self._draw_text:
-            surface.blit(
-                self._name_text,
-                self._name_text.get_rect(center=self._circle.center),
+        self._bounce_sound_on = not self._bounce_sound_on
+
+    def draw(self, surface, center=None, radius=None, color=None):
+        """Draw the circle to the surface, at center, with radius and in \
+            color if they are given; return the Rect that was drawn over."""
+        if center is None:
+            center = self._circle.center_xy
+        if radius is None:
+            radius = self._circle.radius
+        if color is None:
+            color = self._world.colors[self._index]
+        drawn = pygame.draw.circle(surface, color, center, radius)
+        label = self.draw_label(surface, center)
+        if label:
+            drawn.union_ip(label)
+        return drawn
+
+    def draw_label(self, surface, center=None):
+        """Draw the ball's name if the debugging text is on; return the \
+            Rect that was drawn over or None."""
+        if not self._draw_text:
+            return None
+        if center is None:
+            center = self._circle.center_xy
+        return surface.blit(
+            self._name_text,
+            self._name_text.get_rect(center=center),
+        )
+
+    def play_bounce_sound(self):
+        """Ask for the ball's bounce sound unless it is muted. It is \
+            played with the others asked for this frame by audio.flush."""
+        if self._bounce_sound_on:
+            audio.play(
+                self._bounce_sound, self._world.centers.item(self._index, 0)
             )
 
     def wall_reflect(self, xmin, xmax, ymin, ymax):
         """Reflect the ball off of a wall, \
             play a sound if the sound flag is on."""
 
-        if (self._circle.center.x + self._circle.radius) >= xmax or (
-            self._circle.center.x - self._circle.radius
-        ) <= xmin:
-            self._velocity.x = self._velocity.x * -1
-            self._bounce_sound.play()
+        velocities = self._world.velocities
+        (center_x, center_y) = self._circle.center_xy
+        radius = self._circle.radius
+        if (center_x + radius) >= xmax or (center_x - radius) <= xmin:
+            velocities[self._index, 0] *= -1
+            self.play_bounce_sound()
 
-        if (self._circle.center.y - self._circle.radius) <= ymin or (
-            self._circle.center.y + self._circle.radius
-        ) >= ymax:
-            self._velocity.y = self._velocity.y * -1
-            self._bounce_sound.play()
+        if (center_y - radius) <= ymin or (center_y + radius) >= ymax:
+            velocities[self._index, 1] *= -1
+            self.play_bounce_sound()
 
     def bounce(self, other_ball):
         """Bounce the ball off of another ball, \
             play a sound if the ball is no alive."""
 
-        normal = other_ball.center - self.center
-        self._velocity = self._velocity.reflect(normal)
-        self._bounce_sound.play()
-        other_ball._bounce_sound.play()
+        (center_x, center_y) = self._circle.center_xy
+        (other_x, other_y) = other_ball.circle.center_xy
+        normal_x = other_x - center_x
+        normal_y = other_y - center_y
+        length = hypot(normal_x, normal_y)
+        if length > 0:
+            # Reflect the velocity about the normal, v - 2 (v . n) n.
+            normal_x /= length
+            normal_y /= length
+            velocities = self._world.velocities
+            along = 2 * (
+                velocities.item(self._index, 0) * normal_x
+                + velocities.item(self._index, 1) * normal_y
+            )
+            velocities[self._index, 0] -= along * normal_x
+            velocities[self._index, 1] -= along * normal_y
+        self.play_bounce_sound()
+        other_ball.play_bounce_sound()
 
     def collide_with(self, other_ball):
         """Return true if self collides with other_ball."""
 
-        return self._circle.distance_from(other_ball._circle) <= (
-            self.radius + other_ball.radius
+        reach = self._circle.radius + other_ball.circle.radius
+        return (
+            self._circle.squared_distance_from(other_ball.circle)
+            <= reach * reach
         )
 
     def separate_from(self, other_ball, rect):
         """Separate a ball from the other ball so \
             they are no longer overlapping."""
 
-        distance_between_balls = self.circle.distance_from(other_ball.circle)
+        distance_between_balls = self._circle.distance_from(other_ball.circle)
         distance_to_move = (
-            self.radius + other_ball.radius
+            self._circle.radius + other_ball.circle.radius
         ) - distance_between_balls
         half_distance = distance_to_move / 2
 
-        velocity = -self.velocity
-        if not other_ball.is_alive:
-            factor = 2
-        else:
-            factor = 1
-        velocity = velocity * half_distance * factor
-        self.circle.move_ip(*velocity)
-
-        velocity = -other_ball.velocity
-        if not self.is_alive:
-            factor = 2
-        else:
-            factor = 1
-        velocity = velocity * half_distance * factor
-        other_ball.circle.move_ip(*velocity)
+        # Move each ball back along its own velocity, twice as far when the
+        # other ball is dead and will not move.
+        for ball, other in ((self, other_ball), (other_ball, self)):
+            factor = half_distance if other.is_alive else 2 * half_distance
+            velocities = ball.world.velocities
+            ball.circle.move_ip(
+                -velocities.item(ball.index, 0) * factor,
+                -velocities.item(ball.index, 1) * factor,
+            )
 
     @property
     def name(self):
@@ -236,6 +317,18 @@ class Ball:
 
         return self._name
 
+    @property
+    def world(self):
+        """Return the world holding the ball's state."""
+
+        return self._world
+
+    @property
+    def index(self):
+        """Return the ball's row in its world."""
+
+        return self._index
+
     @property
     def rect(self):
         """Return the ball's rect."""
@@ -264,19 +357,35 @@ class Ball:
     def color(self):
         """Return the color of the ball."""
 
-        return self._color
+        return pygame.Color(*self._world.colors[self._index].tolist())
 
     @property
     def velocity(self):
         """Return the ball's velocity"""
 
-        return self._velocity
+        return pygame.Vector2(*self._world.velocities[self._index])
 
     @property
     def is_alive(self):
         """Return true if the ball is still alive."""
 
-        return self._is_alive
+        return bool(self._world.alive[self._index])
+
+    @property
+    def bounce_count(self):
+        """Return how many bounces are left before the ball dies."""
+
+        return self._world.bounce_counts[self._index].item()
+
+    def set_bounce_count(self, count):
+        """Set how many bounces are left before the ball dies."""
+
+        self._world.bounce_counts[self._index] = count
+
+    def kill(self):
+        """Kill the ball; it stops moving and fades to white."""
+
+        self._world.kill(self._index)
 
     def toggle_sound(self):
         """Turn off the sound effects."""
@@ -286,28 +395,32 @@ class Ball:
     def too_close(self, x_coord, y_coord, min_dist):
         """Is the ball too close to some point by some min_dist?"""
 
-        point = pygame.Vector2(x_coord, y_coord)
-        distance = (self.center - point).length()
-        return distance <= min_dist
+        (center_x, center_y) = self._circle.center_xy
+        return hypot(center_x - x_coord, center_y - y_coord) <= min_dist
 
     def stop(self):
         """Stop the ball from moving."""
 
-        self._velocity = pygame.Vector2(0, 0)
+        self._world.velocities[self._index] = (0, 0)
 
     def set_velocity(self, x_coord, y_coord):
         """Set the ball's velocity."""
 
-        self._velocity = pygame.Vector2(x_coord, y_coord)
+        self._world.velocities[self._index] = (x_coord, y_coord)
+        if self._world.asleep[self._index]:
+            self._world.wake(self._index)
 
     def update(self):
         """Update the ball's position"""
 
-        self._circle.move_ip(*self._velocity)
+        velocities = self._world.velocities
+        self._circle.move_ip(
+            velocities.item(self._index, 0), velocities.item(self._index, 1)
+        )
         # self._circle.move_ip()
 
     def __str__(self):
         """Ball stringify."""
 
         return f"Ball(name = {self.name}, center = {self._circle.center},\
-             velocity = {self._velocity})"
+             velocity = {self.velocity})"
@@ -0,0 +1,407 @@
+# Moses Merugu
+# CPSC 386-03
+# 2022-05-09
+# mmeru@csu.fullerton.edu
+# @mmeru
+#
+# Lab 04-00
+#
+# Bounce with pygame!
+#
+"""Broadphase collision culling for the bouncing ball demo.
+
+A broadphase takes the (n, 2) array of ball centers and the (n,) array of
+radii and returns two index arrays (first, second) of the pairs of balls
+that may be touching, with first < second and sorted by (first, second).
+A broadphase that keeps state between frames forgets it on reset(). A
+broadphase that keeps a grid also answers query_rect() with the balls of
+its last call near a rect; the others return None.
+Only those pairs are handed to the narrow phase (BallWorld.collide) which
+does the exact test."""
+
+import numpy as np
+
+
+def _empty_pairs():
+    """Return an empty (first, second) pair of index arrays."""
+    return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+
+
+def _sorted_pairs(first, second):
+    """Order pairs by (first, second) like the brute force loop so the \
+        collision response does not depend on the broadphase."""
+    order = np.lexsort((second, first))
+    return first[order], second[order]
+
+
+def _boxes_overlap(centers, radii, first, second):
+    """Return a mask of the pairs whose bounding boxes overlap."""
+    reach = radii[first] + radii[second]
+    # np.take gathers whole rows several times faster than indexing.
+    gap = np.abs(
+        np.take(centers, first, axis=0) - np.take(centers, second, axis=0)
+    )
+    return (gap[:, 0] <= reach) & (gap[:, 1] <= reach)
+
+
+def _key_ranges(sorted_keys, order, low_keys, high_keys):
+    """Return the balls with keys from each low key to its high key, \
+        inclusive, and how many balls each range holds.
+
+    The balls are hashed into sorted_keys, with order mapping a position in
+    sorted_keys back to a ball index."""
+    start = np.searchsorted(sorted_keys, low_keys, side="left")
+    end = np.searchsorted(sorted_keys, high_keys, side="right")
+    counts = end - start
+    total = counts.sum()
+    if not total:
+        return np.empty(0, dtype=np.intp), counts
+    run_start = np.repeat(np.cumsum(counts) - counts, counts)
+    members = order[np.repeat(start, counts) + (np.arange(total) - run_start)]
+    return members, counts
+
+
+def _cell_members(sorted_keys, order, needles, needle_keys):
+    """Pair every needle with every ball in the cell of its key.
+
+    Return the needles repeated once per member of their cell and the
+    matching members."""
+    members, counts = _key_ranges(sorted_keys, order, needle_keys, needle_keys)
+    if not members.size:
+        return _empty_pairs()
+    return np.repeat(needles, counts), members
+
+
+def _sweep(sorted_lows, highs):
+    """Return the positions (p, q), p < q, of the intervals that overlap, \
+        given intervals sorted by their low ends.
+
+    The intervals after p overlapping it are the ones up to the last low
+    end inside it, found with one searchsorted for every interval."""
+    positions = np.arange(len(sorted_lows))
+    ends = np.searchsorted(sorted_lows, highs, side="right")
+    counts = ends - positions - 1
+    total = counts.sum()
+    if not total:
+        return _empty_pairs()
+    run_start = np.repeat(np.cumsum(counts) - counts, counts)
+    first = np.repeat(positions, counts)
+    return first, first + 1 + (np.arange(total) - run_start)
+
+
+def _rect_cells(left, top, right, bottom, cell_size, shape):
+    """Return the columns, first row and last row of the cells meeting a \
+        rect, in a grid of shape (columns, rows) whose first cell starts \
+        at 0; or None if the rect misses the grid."""
+    first_column = max(int(np.floor(left / cell_size)), 0)
+    last_column = min(int(np.floor(right / cell_size)), shape[0] - 1)
+    first_row = max(int(np.floor(top / cell_size)), 0)
+    last_row = min(int(np.floor(bottom / cell_size)), shape[1] - 1)
+    if first_column > last_column or first_row > last_row:
+        return None
+    columns = np.arange(first_column, last_column + 1, dtype=np.int64)
+    return columns, first_row, last_row
+
+
+class BruteForce:
+    """Test every pair of balls; O(n^2) in the number of balls."""
+
+    def reset(self):
+        """Forget any state kept from earlier frames."""
+
+    def query_rect(self, left, top, right, bottom):
+        """Return None; there is no grid to look balls up in."""
+        return None
+
+    def pairs(self, centers, radii):
+        """Return every pair (i, j) with i < j."""
+        first, second = np.triu_indices(len(centers), 1)
+        return first.astype(np.intp), second.astype(np.intp)
+
+
+class SpatialHash:
+    """Uniform grid broadphase.
+
+    Each ball is hashed into the grid cell that holds its center. With cells
+    at least one diameter wide, a ball can only touch balls in its own cell
+    or in one of the eight cells around it, so the work per frame grows with
+    the number of balls rather than the number of pairs.
+
+    The grid is a sorted array of cell keys rather than a dictionary, so
+    building and querying it are a handful of array operations however
+    many balls there are."""
+
+    # Our own cell and half of the eight neighboring cells; the other half
+    # is visited when the neighboring cell looks back at us, so every pair
+    # is seen once.
+    _forward_neighbors = ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1))
+
+    def __init__(self, cell_size=None):
+        """Initialize a grid with square cells of cell_size. Without a \
+            cell size the cells are one diameter of the largest ball."""
+        self._cell_size = cell_size
+        # The grid of the last call to pairs: (cell size, origin cell,
+        # shape, sorted keys, order).
+        self._grid = None
+
+    @property
+    def cell_size(self):
+        """Return the width of a grid cell."""
+        return self._cell_size
+
+    def reset(self):
+        """Forget any state kept from earlier frames."""
+        self._grid = None
+
+    def query_rect(self, left, top, right, bottom):
+        """Return the balls of the last call to pairs whose centers lay \
+            in a grid cell meeting the rect, or None if there is no grid.
+
+        The work grows with the number of cells the rect covers and the
+        balls in them, not with the number of balls in the grid."""
+        if self._grid is None:
+            return None
+        (cell_size, origin, shape, sorted_keys, order) = self._grid
+        (offset_x, offset_y) = (origin * cell_size).tolist()
+        cells = _rect_cells(
+            left - offset_x,
+            top - offset_y,
+            right - offset_x,
+            bottom - offset_y,
+            cell_size,
+            shape,
+        )
+        if cells is None:
+            return np.empty(0, dtype=np.intp)
+        (columns, first_row, last_row) = cells
+        # The rows of a column have consecutive keys.
+        height = shape[1] + 2
+        members, _ = _key_ranges(
+            sorted_keys,
+            order,
+            (columns + 1) * height + (first_row + 1),
+            (columns + 1) * height + (last_row + 1),
+        )
+        return members
+
+    def pairs(self, centers, radii):
+        """Return the pairs (i, j), i < j, whose bounding boxes overlap."""
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+        radii = np.asarray(radii, dtype=np.float64)
+        self._grid = None
+        if len(centers) < 2:
+            return _empty_pairs()
+        cell_size = 2 * radii.max()
+        if self._cell_size:
+            cell_size = max(self._cell_size, cell_size)
+
+        cells = np.floor(centers / cell_size).astype(np.int64)
+        origin = cells.min(axis=0)
+        cells -= origin
+        # Leave a row and column of empty cells on every side so the keys
+        # of the neighbors of border cells never wrap around.
+        height = cells[:, 1].max() + 3
+        keys = (cells[:, 0] + 1) * height + (cells[:, 1] + 1)
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        self._grid = (
+            cell_size,
+            origin,
+            (cells[:, 0].max() + 1, height - 2),
+            sorted_keys,
+            order,
+        )
+
+        firsts = []
+        seconds = []
+        for offset_x, offset_y in SpatialHash._forward_neighbors:
+            # Walking the balls in key order keeps the searches sorted,
+            # which is much kinder to the cache than searching at random.
+            neighbor_keys = sorted_keys + (offset_x * height + offset_y)
+            first, second = _cell_members(
+                sorted_keys, order, order, neighbor_keys
+            )
+            if offset_x == 0 and offset_y == 0:
+                keep = first < second
+                first = first[keep]
+                second = second[keep]
+            firsts.append(first)
+            seconds.append(second)
+        if not firsts:
+            return _empty_pairs()
+        first = np.concatenate(firsts)
+        second = np.concatenate(seconds)
+        first, second = np.minimum(first, second), np.maximum(first, second)
+        keep = _boxes_overlap(centers, radii, first, second)
+        return _sorted_pairs(first[keep], second[keep])
+
+
+class StaticIndex:
+    """Grid over balls that never move.
+
+    The grid is built once when the balls stop and is then only queried by
+    the balls that still move, so the stopped balls cost nothing per frame
+    beyond the cells the moving balls look at."""
+
+    def __init__(self, centers, radii):
+        """Hash the centers of the stopped balls into a grid."""
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+        radii = np.asarray(radii, dtype=np.float64)
+        self._centers = centers
+        self._radii = radii
+        self._max_radius = radii.max(initial=0)
+        self._cell_size = max(2 * self._max_radius, 1.0)
+        if not centers.size:
+            return
+        cells = np.floor(centers / self._cell_size).astype(np.int64)
+        self._origin = cells.min(axis=0)
+        cells -= self._origin
+        self._shape = cells.max(axis=0) + 1
+        keys = cells[:, 0] * self._shape[1] + cells[:, 1]
+        self._order = np.argsort(keys, kind="stable")
+        self._sorted_keys = keys[self._order]
+
+    def __len__(self):
+        """Return the number of balls in the index."""
+        return len(self._centers)
+
+    def query_rect(self, left, top, right, bottom):
+        """Return the indexed balls whose bounding boxes meet the rect."""
+        if not self._centers.size:
+            return np.empty(0, dtype=np.intp)
+        # A ball reaches into the rect from a cell at most one radius away.
+        reach = self._max_radius
+        (offset_x, offset_y) = (self._origin * self._cell_size).tolist()
+        cells = _rect_cells(
+            left - reach - offset_x,
+            top - reach - offset_y,
+            right + reach - offset_x,
+            bottom + reach - offset_y,
+            self._cell_size,
+            self._shape,
+        )
+        if cells is None:
+            return np.empty(0, dtype=np.intp)
+        (columns, first_row, last_row) = cells
+        members, _ = _key_ranges(
+            self._sorted_keys,
+            self._order,
+            columns * self._shape[1] + first_row,
+            columns * self._shape[1] + last_row,
+        )
+        centers = self._centers[members]
+        radii = self._radii[members]
+        keep = (
+            (centers[:, 0] + radii >= left)
+            & (centers[:, 0] - radii <= right)
+            & (centers[:, 1] + radii >= top)
+            & (centers[:, 1] - radii <= bottom)
+        )
+        return members[keep]
+
+    def query(self, centers, radii):
+        """Return the pairs (i, j) of a query ball i and an indexed ball j \
+            whose bounding boxes overlap."""
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+        radii = np.asarray(radii, dtype=np.float64)
+        if not self._centers.size or not centers.size:
+            return _empty_pairs()
+        span = int(np.ceil((radii.max() + self._max_radius) / self._cell_size))
+        cells = np.floor(centers / self._cell_size).astype(np.int64)
+        cells -= self._origin
+        needles = np.arange(len(centers), dtype=np.intp)
+        firsts = []
+        seconds = []
+        for offset_x in range(-span, span + 1):
+            for offset_y in range(-span, span + 1):
+                cell_x = cells[:, 0] + offset_x
+                cell_y = cells[:, 1] + offset_y
+                inside = (
+                    (cell_x >= 0)
+                    & (cell_x < self._shape[0])
+                    & (cell_y >= 0)
+                    & (cell_y < self._shape[1])
+                )
+                first, second = _cell_members(
+                    self._sorted_keys,
+                    self._order,
+                    needles[inside],
+                    cell_x[inside] * self._shape[1] + cell_y[inside],
+                )
+                firsts.append(first)
+                seconds.append(second)
+        first = np.concatenate(firsts)
+        second = np.concatenate(seconds)
+        reach = radii[first] + self._radii[second]
+        gap = np.abs(centers[first] - self._centers[second])
+        keep = (gap[:, 0] <= reach) & (gap[:, 1] <= reach)
+        return first[keep], second[keep]
+
+
+class SweepAndPrune:
+    """Sort and sweep broadphase with temporal coherence.
+
+    The balls are kept sorted by the low edge of their bounding boxes
+    along the axis the centers are most spread out on. Balls barely move
+    from one frame to the next so last frame's order is almost sorted
+    already, and NumPy's stable sort, which finds the sorted runs, repairs
+    it in close to linear time. The sweep then finds, with one
+    searchsorted for every ball, the run of balls whose low edge falls
+    inside its box along the axis; only those pairs are tested on the other
+    axis. Unlike a grid it does not care how tightly the balls are
+    clustered or how different their sizes are."""
+
+    def __init__(self):
+        """Initialize an empty sweep and prune structure."""
+        self._order = None
+        self._axis = 0
+
+    def reset(self):
+        """Forget the sorted order; the next call sorts from scratch. Call \
+            this when the balls passed in are no longer the same balls."""
+        self._order = None
+
+    def query_rect(self, left, top, right, bottom):
+        """Return None; the sorted order is not kept as a grid."""
+        return None
+
+    def _sort(self, lows, axis):
+        """Return the ball indices sorted by their low edges, starting \
+            from last frame's order when it is for the same balls."""
+        order = self._order
+        if order is None or len(order) != len(lows) or axis != self._axis:
+            order = np.argsort(lows, kind="stable")
+        else:
+            order = order[np.argsort(lows[order], kind="stable")]
+        self._order = order
+        self._axis = axis
+        return order
+
+    def pairs(self, centers, radii):
+        """Return the pairs (i, j), i < j, whose bounding boxes overlap."""
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+        radii = np.asarray(radii, dtype=np.float64)
+        count = len(centers)
+        if count < 2:
+            return _empty_pairs()
+        spread = centers.var(axis=0)
+        axis = int(spread[1] > spread[0])
+        lows = centers[:, axis] - radii
+        order = self._sort(lows, axis)
+        sorted_radii = radii[order]
+        sorted_lows = lows[order]
+        first, second = _sweep(sorted_lows, sorted_lows + 2 * sorted_radii)
+        if not first.size:
+            return _empty_pairs()
+        # The pairs overlap along the axis; test the other axis on arrays
+        # in sorted order, which is cheaper than gathering whole rows.
+        other_lows = centers[order, 1 - axis] - sorted_radii
+        other_highs = other_lows + 2 * sorted_radii
+        keep = (other_lows[second] <= other_highs[first]) & (
+            other_lows[first] <= other_highs[second]
+        )
+        first = order[first[keep]]
+        second = order[second[keep]]
+        return _sorted_pairs(
+            np.minimum(first, second), np.maximum(first, second)
+        )
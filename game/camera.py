@@ -0,0 +1,129 @@
+# Moses Merugu
+# CPSC 386-03
+# 2022-05-09
+# mmeru@csu.fullerton.edu
+# @mmeru
+#
+# Lab 04-00
+#
+# Bounce with pygame!
+#
+"""A camera looking at part of a world that may be larger than the window.
+
+The world has its own coordinates. The camera keeps the world point at the
+center of the window and a zoom, the number of window pixels per world
+unit, and converts between the two coordinate systems."""
+
+import numpy as np
+
+
+class Camera:
+    """A pannable, zoomable view of a world rect."""
+
+    min_zoom = 0.02
+    max_zoom = 8.0
+
+    def __init__(self, world_rect, view_size, zoom=1.0):
+        """Initialize a camera showing a window of view_size pixels of \
+            world_rect, a pygame.Rect, centered on the world."""
+        self._world_rect = world_rect
+        self._view_size = view_size
+        self._zoom = min(max(zoom, Camera.min_zoom), Camera.max_zoom)
+        self._center = (
+            float(world_rect.centerx),
+            float(world_rect.centery),
+        )
+
+    @property
+    def zoom(self):
+        """Return the window pixels per world unit."""
+        return self._zoom
+
+    @property
+    def center(self):
+        """Return the world point at the center of the window."""
+        return self._center
+
+    @property
+    def world_rect(self):
+        """Return the rect of the world the camera looks at."""
+        return self._world_rect
+
+    @property
+    def viewport(self):
+        """Return the (left, top, right, bottom) of the world in view."""
+        half_width = self._view_size[0] / (2 * self._zoom)
+        half_height = self._view_size[1] / (2 * self._zoom)
+        return (
+            self._center[0] - half_width,
+            self._center[1] - half_height,
+            self._center[0] + half_width,
+            self._center[1] + half_height,
+        )
+
+    @property
+    def is_identity(self):
+        """Return True if world and window coordinates are the same."""
+        (left, top, _, _) = self.viewport
+        return self._zoom == 1.0 and left == 0.0 and top == 0.0
+
+    def set_center(self, center_x, center_y):
+        """Look at the world point (center_x, center_y), kept inside \
+            the world."""
+        rect = self._world_rect
+        self._center = (
+            min(max(center_x, rect.left), rect.right),
+            min(max(center_y, rect.top), rect.bottom),
+        )
+
+    def pan(self, delta_x, delta_y):
+        """Move the view by (delta_x, delta_y) window pixels."""
+        self.set_center(
+            self._center[0] + delta_x / self._zoom,
+            self._center[1] + delta_y / self._zoom,
+        )
+
+    def set_zoom(self, zoom, anchor=None):
+        """Set the zoom, keeping the window point anchor, or the center \
+            of the window, over the same world point."""
+        zoom = min(max(zoom, Camera.min_zoom), Camera.max_zoom)
+        if anchor is not None:
+            (world_x, world_y) = self.to_world(anchor)
+            self._zoom = zoom
+            (moved_x, moved_y) = self.to_world(anchor)
+            self.set_center(
+                self._center[0] + world_x - moved_x,
+                self._center[1] + world_y - moved_y,
+            )
+        else:
+            self._zoom = zoom
+
+    def zoom_by(self, factor, anchor=None):
+        """Multiply the zoom by factor; see set_zoom."""
+        self.set_zoom(self._zoom * factor, anchor)
+
+    def to_world(self, point):
+        """Return the world point under the window point."""
+        (left, top, _, _) = self.viewport
+        return (left + point[0] / self._zoom, top + point[1] / self._zoom)
+
+    def to_screen(self, point):
+        """Return the window point over the world point."""
+        (left, top, _, _) = self.viewport
+        return (
+            (point[0] - left) * self._zoom,
+            (point[1] - top) * self._zoom,
+        )
+
+    def to_screen_many(self, centers, radii):
+        """Return the (n, 2) window centers and (n,) window radii of \
+            balls with world centers and radii."""
+        (left, top, _, _) = self.viewport
+        centers = (np.asarray(centers) - (left, top)) * self._zoom
+        return centers, np.asarray(radii) * self._zoom
+
+    def rect_to_screen(self, rect):
+        """Return the window rect (left, top, width, height) covering a \
+            world pygame.Rect."""
+        (left, top) = self.to_screen(rect.topleft)
+        return (left, top, rect.width * self._zoom, rect.height * self._zoom)
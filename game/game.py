@@ -12,13 +12,18 @@
 
 import os
 import sys
+import threading
+import time
 import pygame
 from game import rgbcolors
+from game.broadphase import SpatialHash
+from game.stats import FrameStats, startup_profile
 from game.scene import (
     EmptyPressAnyKeyScene,
     BlinkingTitle,
     BouncingBallsScene,
     SplashScene,
+    StressBallsScene,
 )
 
 
@@ -37,16 +42,44 @@ class VideoGame:
         window_width=800,
         window_height=800,
         window_title='My Awesome Game',
+        max_catchup_steps=5,
+        stats=None,
+        headless=False,
+        pipelined=False,
+        profile_startup=False,
     ):
         """Initialize a new game with the given window size and \
-            window title."""
-        pygame.init()
+            window title. A headless game draws into an offscreen window \
+            and plays no sound, so it runs where there is no display. A \
+            pipelined game steps the scenes that allow it on a second \
+            thread while the last step is drawn. With profile_startup the \
+            time taken to start up is printed after the first frame."""
+        if headless:
+            # SDL's dummy drivers must be chosen before pygame starts.
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
+            os.environ['SDL_AUDIODRIVER'] = 'dummy'
+        # Only the display is started here. The mixer and the font module
+        # are started by the first sound and font loaded, see audio.init
+        # and text.FontRegistry, and the joystick is never used.
         self._window_size = (window_width, window_height)
         self._clock = pygame.time.Clock()
-        self._screen = pygame.display.set_mode(self._window_size)
         self._title = window_title
-        pygame.display.set_caption(self._title)
+        with startup_profile.phase('display'):
+            pygame.display.init()
+            self._screen = pygame.display.set_mode(self._window_size)
+            pygame.display.set_caption(self._title)
         self._game_is_over = False
+        # The most simulation steps run for one rendered frame; when the
+        # renderer falls further behind, the simulation slows down instead
+        # of spiralling.
+        self._max_catchup_steps = max_catchup_steps
+        # When given a FrameStats, every step and frame of the scenes that
+        # ask to be measured is timed and a summary is printed when the
+        # game ends.
+        self._stats = stats
+        self._recording = False
+        self._pipelined = pipelined
+        self._profile_startup = profile_startup
         if not pygame.font:
             print("Warning, fonts disabled")
         if not pygame.mixer:
@@ -65,38 +98,236 @@ class VideoGame:
         )
 
     def run(self):
-        """Run the game; the main game loop."""
+        """Run the game; the main game loop.
+
+        The scene is simulated in fixed steps of 1 / scene.tick_rate()
+        seconds no matter how fast frames are rendered. The time left over
+        after the last whole step is handed to the scene to interpolate
+        between the last two simulation states."""
+        if self._profile_startup:
+            startup_profile.begin('first frame')
         while not self._game_is_over:
             for scene in self.scene_graph:
                 scene.start_scene()
-                while scene.is_valid():
-                    self._clock.tick(scene.frame_rate())
-                    for event in pygame.event.get():
-                        scene.process_event(event)
-                    scene.update_scene()
-                    scene.draw()
-                    scene.render_updates()
-                    pygame.display.update()
+                # Only the scenes that ask for it are timed, from after
+                # they start to before they end; title screens would
+                # skew the numbers.
+                self._recording = bool(self._stats) and scene.is_measured()
+                if self._recording:
+                    self._stats.start()
+                snapshots = (
+                    scene.snapshot_buffer() if self._pipelined else None
+                )
+                if snapshots:
+                    self._run_pipelined(scene, snapshots)
+                else:
+                    self._run_scene(scene)
+                if self._recording:
+                    self._stats.stop()
+                    self._recording = False
                 scene.end_scene()
             self._game_is_over = True
+        if self._stats:
+            print(self._stats.report())
         pygame.quit()
         sys.exit(0)
 
+    def _step_scene(self, scene, accumulator):
+        """Run the whole steps of the scene the accumulated seconds allow \
+            and return the seconds left over."""
+        step = 1.0 / scene.tick_rate()
+        steps = 0
+        while accumulator >= step:
+            if steps == self._max_catchup_steps:
+                return accumulator % step
+            step_start = time.perf_counter()
+            scene.update_scene()
+            if self._recording:
+                self._stats.record_step(time.perf_counter() - step_start)
+            accumulator -= step
+            steps += 1
+        return accumulator
+
+    def _present(self, scene, frame_start):
+        """Draw the scene and show it."""
+        scene.draw()
+        scene.render_updates()
+        dirty_rects = scene.dirty_rects()
+        if dirty_rects is None:
+            pygame.display.update()
+        else:
+            pygame.display.update(dirty_rects)
+        if self._recording:
+            self._stats.record_frame(time.perf_counter() - frame_start)
+        self._end_startup_profile()
+
+    def _end_startup_profile(self):
+        """End the first frame's phase and print the startup profile if \
+            it is being taken."""
+        if self._profile_startup:
+            startup_profile.end()
+            print(startup_profile.report())
+            self._profile_startup = False
+
+    def _run_scene(self, scene):
+        """Step and draw the scene in turn until it is no longer valid."""
+        accumulator = 0.0
+        self._clock.tick()
+        while scene.is_valid():
+            accumulator += self._clock.tick(scene.frame_rate()) / 1000
+            frame_start = time.perf_counter()
+            for event in pygame.event.get():
+                scene.process_event(event)
+            accumulator = self._step_scene(scene, accumulator)
+            scene.interpolate(accumulator * scene.tick_rate())
+            self._present(scene, frame_start)
+
+    def _simulate_in_background(self, scene, snapshots, stop, errors):
+        """Step the scene in real time and publish a snapshot after every \
+            batch of steps, until stop is set."""
+        try:
+            scene.publish_snapshot(snapshots)
+            accumulator = 0.0
+            last = time.perf_counter()
+            while not stop.is_set():
+                now = time.perf_counter()
+                accumulator += now - last
+                last = now
+                step = 1.0 / scene.tick_rate()
+                if accumulator < step:
+                    # Sleeping lets the drawing thread have the GIL.
+                    time.sleep(step - accumulator)
+                    continue
+                accumulator = self._step_scene(scene, accumulator)
+                scene.publish_snapshot(snapshots)
+        except Exception as error:  # pylint: disable=broad-except
+            errors.append(error)
+
+    def _run_pipelined(self, scene, snapshots):
+        """Step the scene on a second thread and draw its latest snapshot \
+            on this one until the scene is no longer valid.
+
+        Events and the window stay on the main thread, as SDL wants. While
+        pygame and NumPy blit, fill and flip they release the GIL, so the
+        next step runs at the same time."""
+        stop = threading.Event()
+        errors = []
+        simulation = threading.Thread(
+            target=self._simulate_in_background,
+            args=(scene, snapshots, stop, errors),
+            daemon=True,
+        )
+        simulation.start()
+        try:
+            self._clock.tick()
+            while scene.is_valid() and simulation.is_alive():
+                self._clock.tick(scene.frame_rate())
+                frame_start = time.perf_counter()
+                for event in pygame.event.get():
+                    scene.process_event(event)
+                # Without a frame cap the clock never sleeps. Redrawing the
+                # same snapshot would only take the GIL from the simulation,
+                # so wait for the next one, up to a tick, instead.
+                if not scene.frame_rate() and not snapshots.wait(
+                    1.0 / scene.tick_rate()
+                ):
+                    continue
+                snapshot = snapshots.latest()
+                if snapshot is None:
+                    continue
+                scene.use_snapshot(snapshot)
+                # Draw as far past the snapshot as time has moved on.
+                scene.interpolate(
+                    min(
+                        (time.perf_counter() - snapshot.time)
+                        * scene.tick_rate(),
+                        1.0,
+                    )
+                )
+                self._present(scene, frame_start)
+        finally:
+            stop.set()
+            simulation.join()
+            scene.use_snapshot(None)
+        if errors:
+            raise errors[0]
+
+    def simulate(self, scene, ticks, render_every=0):
+        """Step the scene ticks times as fast as possible and return the \
+            FrameStats of the run.
+
+        There is no frame cap and no event handling. Every render_every
+        steps the scene is drawn into the window without showing it; with
+        render_every 0 it is never drawn. The first step, and its drawing
+        if it is drawn, is the first frame of the startup profile."""
+        stats = self._stats if self._stats else FrameStats()
+        if self._profile_startup:
+            startup_profile.begin('first frame')
+        scene.start_scene()
+        stats.start()
+        for tick in range(1, ticks + 1):
+            if not scene.is_valid():
+                break
+            step_start = time.perf_counter()
+            scene.update_scene()
+            stats.record_step(time.perf_counter() - step_start)
+            if render_every and tick % render_every == 0:
+                frame_start = time.perf_counter()
+                scene.interpolate(1.0)
+                scene.draw()
+                scene.render_updates()
+                stats.record_frame(time.perf_counter() - frame_start)
+            self._end_startup_profile()
+        # A run of no steps still prints the profile.
+        self._end_startup_profile()
+        stats.stop()
+        scene.end_scene()
+        return stats
+
 
 class BounceDemo(VideoGame):
     """Bouncing balls demo."""
 
-    def __init__(self, num_balls):
-        """Init the bouncing balls demo."""
-        super().__init__(window_title='Bouncing Balls')
+    def __init__(
+        self,
+        num_balls,
+        stress=False,
+        processes=1,
+        world_size=None,
+        headless=False,
+        pipelined=False,
+        profile_startup=False,
+        count_allocations=False,
+    ):
+        """Init the bouncing balls demo. In stress mode the demo scales \
+            to tens of thousands of balls, stepped by processes worker \
+            processes in a world of world_size, and prints timing \
+            statistics on exit. With count_allocations the balls scene \
+            prints what the Ball methods allocate every frame."""
+        super().__init__(
+            window_title='Bouncing Balls',
+            stats=FrameStats() if stress else None,
+            headless=headless,
+            pipelined=pipelined,
+            profile_startup=profile_startup,
+        )
         self._main_dir = os.path.split(os.path.abspath(__file__))[0]
         self._data_dir = os.path.join(self._main_dir, 'data')
         print(f"Our main directory is {self._main_dir}")
         print(f"Our data directory is {self._data_dir}")
         self._num_balls = num_balls
+        self._stress = stress
+        self._processes = processes
+        self._world_size = world_size
+        self._count_allocations = count_allocations
 
     def build_scene_graph(self):
         """Bouncing balls scene graph."""
+        with startup_profile.phase('scenes'):
+            self._build_scenes()
+
+    def _build_scenes(self):
+        """Build the scenes of the bouncing balls scene graph."""
         # Feel free to change the soundtrack and to use different
         # soundtracks for the different scenes.
         soundtrack = os.path.join(
@@ -118,12 +349,44 @@ class BounceDemo(VideoGame):
                 rgbcolors.yellow,
                 soundtrack,
             ),
-            BouncingBallsScene(
-                self._num_balls, self._screen, rgbcolors.black, 60, soundtrack
-            ),
+            self._balls_scene(soundtrack),
             SplashScene(self._screen, credits_string, soundtrack),
         ]
 
+    def _balls_scene(self, soundtrack=None):
+        """Return the bouncing balls scene."""
+        if self._stress:
+            return StressBallsScene(
+                self._num_balls,
+                self._screen,
+                rgbcolors.black,
+                soundtrack,
+                processes=self._processes,
+                raster=True,
+                world_size=self._world_size,
+            )
+        return BouncingBallsScene(
+            self._num_balls,
+            self._screen,
+            rgbcolors.black,
+            60,
+            soundtrack,
+            broadphase=SpatialHash(),
+            count_allocations=self._count_allocations,
+            dirty_rects=True,
+            # Counting draws every ball with Ball.draw so it is measured.
+            sprites=not self._count_allocations,
+        )
+
+    def simulate_balls(self, ticks, render_every=0):
+        """Run only the bouncing balls scene for ticks steps with no \
+            soundtrack, as fast as possible, and print its statistics."""
+        with startup_profile.phase('scenes'):
+            scene = self._balls_scene()
+        stats = self.simulate(scene, ticks, render_every)
+        print(stats.report())
+        pygame.quit()
+
     def run(self):
         """Run the bouncing balls pygame demo."""
         super().run()
@@ -0,0 +1,207 @@
+# Moses Merugu
+# CPSC 386-03
+# 2022-05-09
+# mmeru@csu.fullerton.edu
+# @mmeru
+#
+# Lab 04-00
+#
+# Bounce with pygame!
+#
+"""Step a BallWorld on several cores.
+
+The arena is cut into a grid of tiles and every tile is stepped by a worker
+process. The ball state lives in shared memory twice over: workers read the
+state of the previous step from one buffer and write the next step into the
+other, so no worker ever reads a row another worker is writing. Every ball
+is owned by the tile holding its center. A tile also steps the balls in a
+halo around it, the ghosts, so collisions across a tile edge are seen by
+both tiles; each tile only writes back the balls it owns. A ball that moves
+into another tile simply has a new owner on the next step."""
+
+from concurrent.futures import ProcessPoolExecutor
+from math import ceil, sqrt
+from multiprocessing import shared_memory
+import os
+import numpy as np
+from game.broadphase import SpatialHash
+from game.world import BallWorld
+
+# Columns of the shared state matrix.
+_CENTER = slice(0, 2)
+_VELOCITY = slice(2, 4)
+_RADIUS = 4
+_BOUNCE_COUNT = 5
+_ALIVE = 6
+_COLUMNS = 7
+
+# The shared state as seen by a worker process.
+_worker_memory = None
+_worker_state = None
+
+
+def _attach(name, count):
+    """Map the shared state into a worker process."""
+    global _worker_memory, _worker_state  # pylint: disable=global-statement
+    _worker_memory = shared_memory.SharedMemory(name=name)
+    _worker_state = np.ndarray(
+        (2, count, _COLUMNS), dtype=np.float64, buffer=_worker_memory.buf
+    )
+
+
+def _tile_of(centers, bounds, tiles):
+    """Return the column and row of the tile owning each center."""
+    (xmin, xmax, ymin, ymax) = bounds
+    (columns, rows) = tiles
+    column = np.floor((centers[:, 0] - xmin) * columns / (xmax - xmin))
+    row = np.floor((centers[:, 1] - ymin) * rows / (ymax - ymin))
+    return (
+        np.clip(column, 0, columns - 1).astype(np.intp),
+        np.clip(row, 0, rows - 1).astype(np.intp),
+    )
+
+
+def _step_tile(tile, read, delta_t, bounds, tiles, halo, continuous):
+    """Step the balls of one tile; return the owned balls that hit a wall \
+        or another ball."""
+    source = _worker_state[read]
+    target = _worker_state[1 - read]
+    centers = source[:, _CENTER]
+    (column, row) = _tile_of(centers, bounds, tiles)
+    owned = (column == tile[0]) & (row == tile[1])
+
+    (xmin, xmax, ymin, ymax) = bounds
+    width = (xmax - xmin) / tiles[0]
+    height = (ymax - ymin) / tiles[1]
+    left = xmin + tile[0] * width
+    top = ymin + tile[1] * height
+    near = (
+        (centers[:, 0] >= left - halo)
+        & (centers[:, 0] < left + width + halo)
+        & (centers[:, 1] >= top - halo)
+        & (centers[:, 1] < top + height + halo)
+    )
+    local = np.flatnonzero(owned | near)
+    if not len(local):
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+
+    world = BallWorld(capacity=len(local))
+    rows = source[local]
+    world.add_many(
+        rows[:, _CENTER],
+        rows[:, _RADIUS],
+        rows[:, _VELOCITY],
+        0,
+        rows[:, _BOUNCE_COUNT],
+    )
+    world.alive[:] = rows[:, _ALIVE] > 0
+    walls, first, second = world.step(
+        delta_t, SpatialHash(), bounds, continuous
+    )
+
+    mine = owned[local]
+    rows = target[local[mine]]
+    rows[:, _CENTER] = world.centers[mine]
+    rows[:, _VELOCITY] = world.velocities[mine]
+    rows[:, _RADIUS] = world.radii[mine]
+    rows[:, _BOUNCE_COUNT] = world.bounce_counts[mine]
+    rows[:, _ALIVE] = world.alive[mine]
+    target[local[mine]] = rows
+    hits = np.unique(np.concatenate((first, second)))
+    return local[walls[mine[walls]]], local[hits[mine[hits]]]
+
+
+class TiledEngine:
+    """Step the balls of a BallWorld in a pool of worker processes."""
+
+    def __init__(self, world, bounds, processes=None):
+        """Share the state of world with a pool of worker processes.
+
+        The bounds (xmin, xmax, ymin, ymax) are cut into about one tile per
+        process. The world must not gain balls while the engine runs."""
+        self._world = world
+        self._bounds = tuple(float(value) for value in bounds)
+        self._processes = processes if processes else os.cpu_count()
+        columns = ceil(sqrt(self._processes))
+        self._tiles = [
+            (column, row)
+            for column in range(columns)
+            for row in range(ceil(self._processes / columns))
+        ]
+        self._grid = (columns, ceil(self._processes / columns))
+        count = len(world)
+        self._memory = shared_memory.SharedMemory(
+            create=True, size=max(1, 2 * count * _COLUMNS * 8)
+        )
+        self._state = np.ndarray(
+            (2, count, _COLUMNS), dtype=np.float64, buffer=self._memory.buf
+        )
+        self._read = 0
+        self._pool = ProcessPoolExecutor(
+            max_workers=self._processes,
+            initializer=_attach,
+            initargs=(self._memory.name, count),
+        )
+
+    def _publish(self):
+        """Copy the world into the buffer the workers read next. The \
+            world stays the source of truth between steps."""
+        state = self._state[self._read]
+        state[:, _CENTER] = self._world.centers
+        state[:, _VELOCITY] = self._world.velocities
+        state[:, _RADIUS] = self._world.radii
+        state[:, _BOUNCE_COUNT] = self._world.bounce_counts
+        state[:, _ALIVE] = self._world.alive
+
+    def _collect(self):
+        """Copy the buffer the workers wrote back into the world."""
+        state = self._state[self._read]
+        was_alive = self._world.alive.copy()
+        self._world.centers[:] = state[:, _CENTER]
+        self._world.velocities[:] = state[:, _VELOCITY]
+        self._world.bounce_counts[:] = state[:, _BOUNCE_COUNT]
+        self._world.alive[:] = state[:, _ALIVE] > 0
+        self._world.start_fade(np.flatnonzero(was_alive & ~self._world.alive))
+
+    def step(self, delta_t, continuous=False):
+        """Advance the world delta_t ticks on every core.
+
+        Return the indices of the balls that hit a wall and of the balls
+        that hit another ball."""
+        self._publish()
+        radii = self._world.radii
+        velocities = self._world.velocities
+        speed = np.sqrt(np.einsum("ij,ij->i", velocities, velocities))
+        # Wide enough to hold the partners of the partners of every ball
+        # a tile owns, wherever they move during the step.
+        reach = 2 * radii.max(initial=0) + speed.max(initial=0) * delta_t
+        halo = 2 * reach
+        futures = [
+            self._pool.submit(
+                _step_tile,
+                tile,
+                self._read,
+                delta_t,
+                self._bounds,
+                self._grid,
+                halo,
+                continuous,
+            )
+            for tile in self._tiles
+        ]
+        results = [future.result() for future in futures]
+        self._read = 1 - self._read
+        self._collect()
+        if not results:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+        return (
+            np.concatenate([walls for walls, _ in results]),
+            np.concatenate([hits for _, hits in results]),
+        )
+
+    def close(self):
+        """Stop the workers and free the shared memory."""
+        self._pool.shutdown()
+        self._state = None
+        self._memory.close()
+        self._memory.unlink()
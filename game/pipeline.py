@@ -0,0 +1,110 @@
+# Moses Merugu
+# CPSC 386-03
+# 2022-05-09
+# mmeru@csu.fullerton.edu
+# @mmeru
+#
+# Lab 04-00
+#
+# Bounce with pygame!
+#
+"""Hand the state of the simulation to the renderer between threads.
+
+The simulation publishes a snapshot of the balls after every batch of steps
+and the renderer draws the latest snapshot, so the two can run at the same
+time. Snapshots live in a triple buffer: the simulation writes one, the
+renderer reads another and the third holds the latest complete snapshot.
+Neither side ever waits for the other beyond swapping two indices."""
+
+import threading
+import time
+import numpy as np
+
+
+class Snapshot:
+    """The state of the balls at one moment, as read-only arrays."""
+
+    def __init__(self):
+        """Initialize an empty snapshot."""
+        self._storage = None
+        self.centers = None
+        self.previous_centers = None
+        self.radii = None
+        self.colors = None
+        self.time = None
+
+    def fill(self, centers, previous_centers, radii, colors):
+        """Copy the state into the snapshot's own arrays, reusing them \
+            when they are large enough."""
+        count = len(centers)
+        if self._storage is None or len(self._storage[0]) < count:
+            self._storage = (
+                np.empty((count, 2), dtype=np.float64),
+                np.empty((count, 2), dtype=np.float64),
+                np.empty(count, dtype=np.float64),
+                np.empty((count, 3), dtype=np.uint8),
+            )
+        views = []
+        for store, values in zip(
+            self._storage, (centers, previous_centers, radii, colors)
+        ):
+            view = store[:count]
+            view[:] = values
+            view = view.view()
+            view.flags.writeable = False
+            views.append(view)
+        (self.centers, self.previous_centers, self.radii, self.colors) = views
+        self.time = time.perf_counter()
+
+    def query_rect(self, left, top, right, bottom):
+        """Return the sorted indices of the balls whose bounding boxes \
+            meet the rect from (left, top) to (right, bottom)."""
+        centers = self.centers
+        radii = self.radii
+        return np.flatnonzero(
+            (centers[:, 0] + radii >= left)
+            & (centers[:, 0] - radii <= right)
+            & (centers[:, 1] + radii >= top)
+            & (centers[:, 1] - radii <= bottom)
+        )
+
+
+class SnapshotBuffer:
+    """A triple buffer of snapshots with one writer and one reader."""
+
+    def __init__(self):
+        """Initialize a buffer with no snapshot published yet."""
+        self._snapshots = (Snapshot(), Snapshot(), Snapshot())
+        self._back = 0
+        self._middle = 1
+        self._front = 2
+        self._fresh = False
+        self._lock = threading.Lock()
+        self._published = threading.Condition(self._lock)
+
+    def publish(self, centers, previous_centers, radii, colors):
+        """Copy the state of the balls into a snapshot and make it the \
+            latest one."""
+        self._snapshots[self._back].fill(
+            centers, previous_centers, radii, colors
+        )
+        with self._lock:
+            (self._back, self._middle) = (self._middle, self._back)
+            self._fresh = True
+            self._published.notify_all()
+
+    def wait(self, timeout):
+        """Wait up to timeout seconds for a snapshot newer than the one \
+            latest returned; return True if there is one."""
+        with self._lock:
+            return self._published.wait_for(lambda: self._fresh, timeout)
+
+    def latest(self):
+        """Return the latest snapshot, or None before the first one. It \
+            stays untouched until the next call."""
+        with self._lock:
+            if self._fresh:
+                (self._front, self._middle) = (self._middle, self._front)
+                self._fresh = False
+        snapshot = self._snapshots[self._front]
+        return snapshot if snapshot.time is not None else None
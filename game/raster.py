@@ -0,0 +1,97 @@
+# Moses Merugu
+# CPSC 386-03
+# 2022-05-09
+# mmeru@csu.fullerton.edu
+# @mmeru
+#
+# Lab 04-00
+#
+# Bounce with pygame!
+#
+"""Draw every ball at once straight into the pixels of a surface.
+
+With tens of thousands of balls even one blit per ball is too many Python
+calls. The rasterizer instead writes the pixels itself: the pixel offsets
+of a disk are computed once per radius and a whole batch of balls is
+splatted into the surface's pixel array with one NumPy assignment. The
+disks are not antialiased."""
+
+import numpy as np
+import pygame
+
+
+class DiskRasterizer:
+    """Splat solid disks into a surface with pygame.surfarray.
+
+    Works on 16 and 32 bit surfaces, which includes the display surface on
+    every platform pygame runs on."""
+
+    def __init__(self, batch_size=16384):
+        """Initialize the rasterizer. Balls are splatted batch_size at a \
+            time to bound the size of the temporary arrays."""
+        self._batch_size = batch_size
+        self._disks = {}
+
+    def _disk(self, radius):
+        """Return the x and y pixel offsets covered by a disk of radius."""
+        offsets = self._disks.get(radius)
+        if offsets is None:
+            span = np.arange(-radius, radius + 1)
+            offset_x, offset_y = np.meshgrid(span, span, indexing="ij")
+            inside = offset_x**2 + offset_y**2 <= radius * radius
+            offsets = (offset_x[inside], offset_y[inside])
+            self._disks[radius] = offsets
+        return offsets
+
+    @staticmethod
+    def _map_colors(surface, colors):
+        """Map an (n, 3) array of RGB colors to the surface's pixel \
+            format, like Surface.map_rgb does for one color."""
+        colors = np.asarray(colors, dtype=np.int64).reshape(-1, 3)
+        masks = surface.get_masks()
+        shifts = surface.get_shifts()
+        losses = surface.get_losses()
+        mapped = np.full(len(colors), masks[3], dtype=np.int64)
+        for channel in range(3):
+            mapped |= (
+                (colors[:, channel] >> losses[channel]) << shifts[channel]
+            ) & masks[channel]
+        return mapped
+
+    def draw(self, surface, centers, radii, colors):
+        """Draw a disk of radius and color at every center; return a list \
+            with the Rect bounding all of them, or an empty list."""
+        if surface.get_bytesize() not in (2, 4):
+            raise ValueError(
+                f"Cannot rasterize into a {surface.get_bitsize()} bit surface"
+            )
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+        if not len(centers):
+            return []
+        pixel_centers = np.rint(centers).astype(np.intp)
+        pixel_radii = np.maximum(
+            np.rint(np.asarray(radii, dtype=np.float64)), 1
+        ).astype(np.intp)
+        mapped = DiskRasterizer._map_colors(surface, colors)
+        (width, height) = surface.get_size()
+
+        pixels = pygame.surfarray.pixels2d(surface)
+        for radius in np.unique(pixel_radii).tolist():
+            (offset_x, offset_y) = self._disk(radius)
+            members = np.flatnonzero(pixel_radii == radius)
+            # Keep batch * disk area temporaries to a sensible size.
+            step = max(1, self._batch_size * 64 // len(offset_x))
+            for start in range(0, len(members), step):
+                batch = members[start : start + step]
+                xs = pixel_centers[batch, 0, None] + offset_x
+                ys = pixel_centers[batch, 1, None] + offset_y
+                inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+                values = np.broadcast_to(mapped[batch, None], xs.shape)
+                pixels[xs[inside], ys[inside]] = values[inside]
+        # The pixel array locks the surface until it is released.
+        del pixels
+
+        low = (pixel_centers - pixel_radii[:, None]).min(axis=0)
+        high = (pixel_centers + pixel_radii[:, None]).max(axis=0) + 1
+        bounds = pygame.Rect(low.tolist(), (high - low).tolist())
+        return [bounds.clip(surface.get_rect())]
@@ -10,12 +10,23 @@
 #
 """Scene objects for making games with PyGame."""
 
+from collections import deque
+from math import ceil, sqrt
 from random import randint
+import numpy as np
 import pygame
 from more_itertools import grouper
-from game import rgbcolors
+from game import audio, rgbcolors, text
 from game.ball import Ball
 from game.animation import Explosion
+from game.broadphase import BruteForce, SpatialHash
+from game.camera import Camera
+from game.parallel import TiledEngine
+from game.pipeline import SnapshotBuffer
+from game.raster import DiskRasterizer
+from game.sprites import BallSpriteCache
+from game.stats import AllocationCounter
+from game.world import BallWorld
 
 
 class Scene:
@@ -24,19 +35,51 @@ class Scene:
     def __init__(self, screen, background_color, soundtrack=None):
         """Scene initializer"""
         self._screen = screen
-        self._background = pygame.Surface(self._screen.get_size())
-        self._background.fill(background_color)
+        self._background_color = background_color
+        # Layers that rarely change are drawn once, in order, into the
+        # cached background and drawn again only once invalidated.
+        self._static_layers = [self._draw_background_color]
+        self._background = None
         self._frame_rate = 60
+        self._tick_rate = 60
+        self._interpolation = 0.0
         self._is_valid = True
         self._soundtrack = soundtrack
         self._render_updates = None
 
+    def _draw_background_color(self, surface):
+        """Fill the surface with the background color."""
+        surface.fill(self._background_color)
+
+    def add_static_layer(self, draw_layer):
+        """Add a static layer, drawn onto a surface by draw_layer, above \
+            the static layers added before it."""
+        self._static_layers.append(draw_layer)
+        self.invalidate_static_layers()
+
+    def invalidate_static_layers(self):
+        """Draw the static layers again before the next frame."""
+        self._background = None
+
+    def _static_composite(self):
+        """Return the static layers drawn into one display format surface."""
+        if self._background is None:
+            background = pygame.Surface(self._screen.get_size())
+            if pygame.display.get_surface():
+                background = background.convert()
+            for draw_layer in self._static_layers:
+                draw_layer(background)
+            self._background = background
+        return self._background
+
     def draw(self):
         """Draw the scene."""
-        self._screen.blit(self._background, (0, 0))
+        self._screen.blit(self._static_composite(), (0, 0))
 
     def process_event(self, event):
         """Process a game event by the scene."""
+        if event.type == pygame.VIDEORESIZE:
+            self.invalidate_static_layers()
 
         if event.type == pygame.QUIT:
             print("Good Bye!")
@@ -52,6 +95,11 @@ class Scene:
     def render_updates(self):
         """Render all sprite updates."""
 
+    def dirty_rects(self):
+        """Return the list of Rects changed by the last frame, or None if \
+            the whole screen needs to be updated."""
+        return None
+
     def update_scene(self):
         """Update the scene state."""
 
@@ -59,6 +107,7 @@ class Scene:
         """Start the scene."""
         if self._soundtrack:
             try:
+                audio.init()
                 pygame.mixer.music.load(self._soundtrack)
                 pygame.mixer.music.set_volume(0.1)
             except pygame.error as pygame_error:
@@ -76,6 +125,32 @@ class Scene:
         """Return the frame rate the scene desires."""
         return self._frame_rate
 
+    def tick_rate(self):
+        """Return how many times per second update_scene is called."""
+        return self._tick_rate
+
+    def is_measured(self):
+        """Return True if the game's timing statistics should cover the \
+            steps and frames of this scene."""
+        return False
+
+    def interpolate(self, alpha):
+        """Set how far, from 0 to 1, the next frame is drawn between the \
+            previous and the current simulation step."""
+        self._interpolation = alpha
+
+    def snapshot_buffer(self):
+        """Return a SnapshotBuffer if the scene can be simulated on one \
+            thread and drawn on another, or None if it cannot."""
+        return None
+
+    def publish_snapshot(self, snapshots):
+        """Publish the state the scene draws into the SnapshotBuffer."""
+
+    def use_snapshot(self, snapshot):
+        """Draw the given Snapshot instead of the live state, or the live \
+            state again if snapshot is None."""
+
 
 class EmptyPressAnyKeyScene(Scene):
     """Empty scene where it will invalidate when a key is pressed."""
@@ -102,6 +177,7 @@ class SplashScene(EmptyPressAnyKeyScene):
         super().__init__(screen, rgbcolors.snow, soundtrack)
         self._message = message
         self._words_per_line = 5
+        self._lines = list(self._split_message())
 
     def _split_message(self):
         """Given a message, \
@@ -117,23 +193,17 @@ class SplashScene(EmptyPressAnyKeyScene):
     def draw(self):
         super().draw()
         (width, height) = self._screen.get_size()
-        press_any_key_font = pygame.font.Font(
-            pygame.font.get_default_font(), 18
-        )
-        press_any_key = press_any_key_font.render(
-            "Press any key.", True, rgbcolors.black
-        )
+        press_any_key = text.render("Press any key.", 18, rgbcolors.black)
         press_any_key_pos = press_any_key.get_rect(
             center=(width / 2, height - 50)
         )
 
-        font = pygame.font.Font(pygame.font.get_default_font(), 25)
         start_pos = (height / 2) - (
             (len(self._message.split()) // self._words_per_line) * 30
         )
         offset = 0
-        for line in self._split_message():
-            line = font.render(line, True, rgbcolors.black)
+        for line in self._lines:
+            line = text.render(line, 25, rgbcolors.black)
             line_pos = line.get_rect(center=(width / 2, start_pos + offset))
             offset += 30
             self._screen.blit(line, line_pos)
@@ -155,38 +225,25 @@ class BlinkingTitle(EmptyPressAnyKeyScene):
         )
         self._size = size
         self._message = message
-        self._t = 0.0
-        self._delta_t = 0.01
+        # The message is rendered once and recolored every frame.
+        self._title = text.TintedText(message, size)
+        # The blink goes from the complement to the color and back in 200
+        # frames, baked once.
+        self._blink = rgbcolors.GradientLUT(
+            self._message_complement_color, color, 101, ping_pong=True
+        )
+        self._frame = 0
 
     def _interpolate(self):
-        # This can be done with pygame.Color.lerp
-        self._t += self._delta_t
-        if self._t > 1.0 or self._t < 0.0:
-            self._delta_t *= -1
-        color = rgbcolors.sum_color(
-            rgbcolors.mult_color(
-                (1.0 - self._t), self._message_complement_color
-            ),
-            rgbcolors.mult_color(self._t, self._message_color),
-        )
-        return color
+        self._frame += 1
+        return self._blink[self._frame]
 
     def draw(self):
         super().draw()
-        presskey_font = pygame.font.Font(
-            pygame.font.get_default_font(), self._size
-        )
-        presskey = presskey_font.render(
-            self._message, True, self._interpolate()
-        )
+        presskey = self._title.render(self._interpolate())
         (width, height) = self._screen.get_size()
         presskey_pos = presskey.get_rect(center=(width / 2, height / 2))
-        press_any_key_font = pygame.font.Font(
-            pygame.font.get_default_font(), 18
-        )
-        press_any_key = press_any_key_font.render(
-            "Press any key.", True, rgbcolors.black
-        )
+        press_any_key = text.render("Press any key.", 18, rgbcolors.black)
         (width, height) = self._screen.get_size()
         press_any_key_pos = press_any_key.get_rect(
             center=(width / 2, height - 50)
@@ -198,19 +255,110 @@ class BlinkingTitle(EmptyPressAnyKeyScene):
 class BouncingBallsScene(Scene, Ball):
     """Bounding balls demo."""
 
+    # The arrow keys pan the camera by a tenth of the window.
+    _pan_keys = {
+        pygame.K_LEFT: (-1, 0),
+        pygame.K_RIGHT: (1, 0),
+        pygame.K_UP: (0, -1),
+        pygame.K_DOWN: (0, 1),
+    }
+    _zoom_keys = {
+        pygame.K_EQUALS: 1.25,
+        pygame.K_PLUS: 1.25,
+        pygame.K_KP_PLUS: 1.25,
+        pygame.K_MINUS: 0.8,
+        pygame.K_KP_MINUS: 0.8,
+    }
+
     def __init__(
-        self, num_balls, screen, background_color, frame_rate, soundtrack=None
+        self,
+        num_balls,
+        screen,
+        background_color,
+        frame_rate,
+        soundtrack=None,
+        broadphase=None,
+        substeps=1,
+        continuous=False,
+        count_allocations=False,
+        dirty_rects=False,
+        sprites=False,
+        raster=False,
+        world_size=None,
     ):
         super().__init__(screen, background_color, soundtrack)
         self._pause_game = False
-        self._boundary_rect = self._screen.get_rect()
+        # The balls bounce inside a world of world_size, which defaults to
+        # the size of the window. The camera shows a part of it.
+        self._boundary_rect = (
+            pygame.Rect((0, 0), world_size)
+            if world_size
+            else self._screen.get_rect()
+        )
+        self._camera = Camera(self._boundary_rect, self._screen.get_size())
+        self.add_static_layer(self._draw_boundaries)
         self._balls = []
+        # Every ball is a view of a row in this world; the hot loop runs on
+        # the world's arrays.
+        self._world = BallWorld(capacity=num_balls)
+        self._previous_centers = self._world.centers.copy()
+        # Each call to update_scene advances the balls by one tick, split
+        # into this many smaller steps. More substeps cost more time and
+        # miss fewer collisions.
+        self._substeps = substeps
+        # With continuous collisions balls are swept along their path and
+        # cannot tunnel through each other or the walls, so large steps
+        # need no substeps.
+        self._continuous = continuous
         self._animation = True
         self._num_balls = num_balls
+        # The broadphase picks the pairs of balls that may be touching;
+        # see game/broadphase.py.
+        self._broadphase = broadphase if broadphase else BruteForce()
+        # Counts what the Ball methods called every frame allocate and prints
+        # a summary when the scene ends.
+        self._allocations = AllocationCounter() if count_allocations else None
+        # In dirty rect mode only the areas the balls left and moved into
+        # are redrawn and pushed to the display.
+        self._use_dirty_rects = dirty_rects
+        self._full_redraw = True
+        self._drawn_rects = []
+        self._dirty_rects = None
+        # With sprites the balls are blitted from pre-rendered surfaces
+        # instead of being rasterized every frame.
+        self._sprite_cache = (
+            BallSpriteCache(background_color) if sprites else None
+        )
+        # With raster all the balls are written into the screen's pixels
+        # with NumPy, which scales to far more balls than one call per
+        # ball; it takes precedence over sprites.
+        self._rasterizer = DiskRasterizer() if raster else None
+        # When the simulation runs on its own thread the balls are drawn
+        # from the latest snapshot it published, and explosions are queued
+        # for the drawing side to make.
+        self._snapshot = None
+        self._explosions = deque()
 
     def start_scene(self):
         super().start_scene()
-        (width, height) = self._screen.get_size()
+        self._spawn_balls()
+
+        # for ball in self._balls:
+        # ball.stop()
+        # ball._life
+
+        self._render_updates = pygame.sprite.RenderUpdates()
+        Explosion.containers = self._render_updates
+        Explosion.preload()
+
+    @property
+    def camera(self):
+        """Return the camera looking at the balls."""
+        return self._camera
+
+    def _spawn_balls(self):
+        """Place the balls randomly, none touching another or a wall."""
+        (width, height) = self._boundary_rect.size
         x_min = 0 + (Ball.default_radius * 2)
         x_max = width - (Ball.default_radius * 2)
         y_min = 0 + (Ball.default_radius * 2)
@@ -227,27 +375,28 @@ class BouncingBallsScene(Scene, Ball):
                         x_coord, y_coord, Ball.default_radius * 2
                     )
 
-            self._balls.append(Ball(str(i), x_coord, y_coord, sound_on=False))
+            self._balls.append(
+                Ball(
+                    str(i), x_coord, y_coord, sound_on=False, world=self._world
+                )
+            )
 
-        self._balls[0]._bounce_count = 9999999
+        self._balls[0].set_bounce_count(9999999)
         self._balls[0].set_velocity(5, 5)
 
-        # for ball in self._balls:
-        # ball.stop()
-        # ball._life
-
-        self._render_updates = pygame.sprite.RenderUpdates()
-        Explosion.containers = self._render_updates
-
     def end_scene(self):
         super().end_scene()
+        if self._allocations:
+            self._allocations.stop()
+            print(self._allocations.report())
 
-    def _draw_boundaries(self):
+    def _draw_boundaries(self, surface):
+        """Draw the walls of the world as seen by the camera."""
         (width, height) = self._screen.get_size()
         pygame.draw.rect(
-            self._screen,
+            surface,
             rgbcolors.yellow,
-            self._boundary_rect,
+            self._camera.rect_to_screen(self._boundary_rect),
             (width // 100),
             (height // 200),
         )
@@ -255,6 +404,8 @@ class BouncingBallsScene(Scene, Ball):
     def process_event(self, event):
         super().process_event(event)
 
+        if event.type == pygame.VIDEOEXPOSE:
+            self._full_redraw = True
         if event.type == pygame.KEYDOWN and event.key == pygame.K_a:
             for ball in self._balls:
                 ball.toggle_draw_text()
@@ -267,6 +418,18 @@ class BouncingBallsScene(Scene, Ball):
         if event.type == pygame.KEYDOWN and event.key == pygame.K_p:
             self._pause_game = not self._pause_game
 
+        if event.type == pygame.KEYDOWN and event.key in self._pan_keys:
+            (width, height) = self._screen.get_size()
+            (delta_x, delta_y) = self._pan_keys[event.key]
+            self._camera.pan(delta_x * width / 10, delta_y * height / 10)
+            self._camera_moved()
+        if event.type == pygame.KEYDOWN and event.key in self._zoom_keys:
+            self._camera.zoom_by(self._zoom_keys[event.key])
+            self._camera_moved()
+        if event.type == pygame.MOUSEWHEEL:
+            self._camera.zoom_by(1.25**event.y, pygame.mouse.get_pos())
+            self._camera_moved()
+
         if event.type == pygame.KEYDOWN and event.key == pygame.K_t:
             if self._soundtrack and pygame.mixer.music.get_busy():
                 pygame.mixer.music.fadeout(500)
@@ -274,56 +437,324 @@ class BouncingBallsScene(Scene, Ball):
             else:
                 if self._soundtrack:
                     try:
+                        audio.init()
                         pygame.mixer.music.load(self._soundtrack)
                     except pygame.error as pygame_error:
                         print("Cannot open the mixer?")
                         raise SystemExit("broken!!") from pygame_error
                     pygame.mixer.music.play(-1)
 
+    def _camera_moved(self):
+        """Redraw everything, the walls included, after a camera move."""
+        self.invalidate_static_layers()
+        self._full_redraw = True
+
+    def snapshot_buffer(self):
+        return SnapshotBuffer()
+
+    def publish_snapshot(self, snapshots):
+        previous = self._previous_centers
+        if len(previous) != len(self._world):
+            previous = self._world.centers
+        snapshots.publish(
+            self._world.centers,
+            previous,
+            self._world.radii,
+            self._world.colors,
+        )
+
+    def use_snapshot(self, snapshot):
+        self._snapshot = snapshot
+
     def render_updates(self):
+        (left, _, right, _) = self._camera.viewport
+        audio.flush(left, right)
+        while self._explosions:
+            (ball, center) = self._explosions.popleft()
+            Explosion(ball, self._camera.to_screen(center))
         if self._render_updates:
-            self._render_updates.clear(self._screen, self._background)
+            self._render_updates.clear(
+                self._screen, self._static_composite()
+            )
             self._render_updates.update()
             dirty = self._render_updates.draw(self._screen)
+            if self._dirty_rects is not None:
+                self._dirty_rects.extend(dirty)
+
+    def dirty_rects(self):
+        if self._dirty_rects is None:
+            return None
+        # Past a point one big update is cheaper than many small ones.
+        (width, height) = self._screen.get_size()
+        area = sum(rect.width * rect.height for rect in self._dirty_rects)
+        if area > width * height // 2:
+            return None
+        return self._dirty_rects
+
+    def _interpolated_centers(self, indices, centers, previous_centers):
+        """Return where to draw the balls at indices between the last \
+            two steps."""
+        current = centers[indices]
+        if len(previous_centers) != len(centers):
+            return current
+        previous = previous_centers[indices]
+        return previous + (current - previous) * self._interpolation
 
     def draw(self):
-        super().draw()
-        for ball in self._balls:
-            ball.draw(self._screen)
-        self._draw_boundaries()
+        if not self._use_dirty_rects or self._full_redraw:
+            super().draw()
+        else:
+            # Erase the balls where they were drawn last frame.
+            background = self._static_composite()
+            for rect in self._drawn_rects:
+                self._screen.blit(background, rect, rect)
+        snapshot = self._snapshot
+        if snapshot is None:
+            # Only the balls in view are drawn. They are looked up in the
+            # broadphase's grid so the balls out of view cost nothing.
+            visible = self._world.query_rect(
+                *self._camera.viewport, self._broadphase
+            )
+            state = (
+                self._world.centers,
+                self._previous_centers,
+                self._world.radii,
+                self._world.colors,
+            )
+        else:
+            # The world and its grid are being stepped on another thread.
+            visible = snapshot.query_rect(*self._camera.viewport)
+            state = (
+                snapshot.centers,
+                snapshot.previous_centers,
+                snapshot.radii,
+                snapshot.colors,
+            )
+        (centers, previous_centers, radii, colors) = state
+        (centers, radii) = self._camera.to_screen_many(
+            self._interpolated_centers(visible, centers, previous_centers),
+            radii[visible],
+        )
+        colors = colors[visible]
+        drawn_rects = self._draw_balls(visible, centers, radii, colors)
+        if not self._use_dirty_rects or self._full_redraw:
+            self._dirty_rects = None
+        elif len(drawn_rects) == len(self._drawn_rects):
+            # One rect per ball covering where it was and where it is.
+            self._dirty_rects = [
+                old_rect.union(new_rect)
+                for old_rect, new_rect in zip(self._drawn_rects, drawn_rects)
+            ]
+        else:
+            self._dirty_rects = self._drawn_rects + drawn_rects
+        self._drawn_rects = drawn_rects
+        self._full_redraw = False
+
+    def _draw_balls(self, indices, centers, radii, colors):
+        """Draw the balls at indices with the given window centers, radii \
+            and colors; return the drawn Rects."""
+        if self._rasterizer is not None:
+            drawn_rects = self._rasterizer.draw(
+                self._screen, centers, radii, colors
+            )
+            return drawn_rects + self._draw_labels(indices, centers.tolist())
+        centers = centers.tolist()
+        if self._sprite_cache is not None:
+            drawn_rects = self._sprite_cache.draw(
+                self._screen, centers, radii.tolist(), colors.tolist()
+            )
+            return drawn_rects + self._draw_labels(indices, centers)
+        return [
+            self._measure(
+                self._balls[index].draw, self._screen, center, radius, color
+            )
+            for index, center, radius, color in zip(
+                indices.tolist(), centers, radii.tolist(), colors.tolist()
+            )
+        ]
+
+    def _draw_labels(self, indices, centers):
+        """Draw the names of the balls at indices if they are on; return \
+            the drawn Rects."""
+        drawn_rects = []
+        if not self._balls:
+            return drawn_rects
+        for index, center in zip(indices.tolist(), centers):
+            label = self._measure(
+                self._balls[index].draw_label, self._screen, center
+            )
+            if label:
+                drawn_rects.append(label)
+        return drawn_rects
+
+    def _measure(self, method, *args):
+        """Call the per-frame Ball method with args and return what it \
+            returns, counting what it allocates if allocations are counted."""
+        if self._allocations is None:
+            return method(*args)
+        with self._allocations as allocations:
+            result = method(*args)
+            allocations.keep(result)
+        return result
 
     def update_scene(self):
-        rect = self._screen.get_rect()
+        if self._allocations:
+            # A frame is a step and the drawing that follows it.
+            self._allocations.end_frame()
+        self._previous_centers = self._world.centers.copy()
         if not self._pause_game:
             super().update_scene()
-            # Update position for all balls
-            for ball in self._balls:
-                ball.update()
-            # Check if a ball passes the walls
-            for ball in self._balls:
-                ball.wall_reflect(rect.left, rect.right, rect.top, rect.bottom)
-            # Check (pairwise) if the ball collides, if so bounce
-            for index, ball in enumerate(self._balls):
-                for other_ball in self._balls[index + 1 :]:
-                    if ball.collide_with(other_ball):
-
-                        ball.separate_from(other_ball, rect)
-                        ball.bounce(other_ball)
-                        ball._bounce_count -= 1
-                        other_ball.bounce(ball)
-                        other_ball._bounce_count -= 1
-
-                        if ball._bounce_count <= 0:
-                            ball._is_alive = False
-                            ball._color = rgbcolors.white
-                            ball.stop()
-                        if other_ball._bounce_count <= 0:
-                            other_ball._is_alive = False
-                            other_ball._color = rgbcolors.white
-                            other_ball.stop()
-                        if not ball.is_alive:
-                            if self._animation:
-                                Explosion(ball)
-                        if not other_ball.is_alive:
-                            if self._animation:
-                                Explosion(other_ball)
+            self._world.advance_fades()
+            for _ in range(self._substeps):
+                self._step(1.0 / self._substeps)
+
+    def _step(self, delta_t):
+        """Advance the simulation by delta_t ticks."""
+        rect = self._boundary_rect
+        walls, first, second = self._world.step(
+            delta_t,
+            self._broadphase,
+            (rect.left, rect.right, rect.top, rect.bottom),
+            self._continuous,
+        )
+        self._play_effects(walls, np.concatenate((first, second)))
+
+    def _play_effects(self, walls, hits):
+        """Play the sounds and explosions of the balls that hit a wall or \
+            another ball."""
+        for index in walls:
+            self._measure(self._balls[index].play_bounce_sound)
+        for index in np.unique(hits):
+            ball = self._balls[index]
+            self._measure(ball.play_bounce_sound)
+            if not ball.is_alive:
+                if self._animation:
+                    self._explosions.append((ball, ball.center))
+
+
+class StressBallsScene(BouncingBallsScene):
+    """Bouncing balls scaled up to tens of thousands of balls.
+
+    The balls only exist as rows of the world; there are no Ball objects,
+    sounds, labels or explosions. The radius shrinks so every ball fits in
+    the world, collisions go through the grid broadphase and the balls are
+    drawn straight from the world's arrays. Frames are not capped so the
+    scene runs as fast as the hardware allows."""
+
+    # The part of the world covered by balls when they are spawned.
+    fill_fraction = 0.3
+
+    def __init__(
+        self,
+        num_balls,
+        screen,
+        background_color,
+        soundtrack=None,
+        broadphase=None,
+        substeps=1,
+        continuous=False,
+        processes=1,
+        sprites=False,
+        raster=False,
+        world_size=None,
+    ):
+        super().__init__(
+            num_balls,
+            screen,
+            background_color,
+            0,
+            soundtrack,
+            broadphase=broadphase if broadphase else SpatialHash(),
+            substeps=substeps,
+            continuous=continuous,
+            sprites=sprites,
+            raster=raster,
+            world_size=world_size,
+        )
+        self._frame_rate = 0
+        # With more than one process the arena is cut into tiles that are
+        # stepped in parallel; see game/parallel.py.
+        self._processes = processes
+        self._engine = None
+
+    def is_measured(self):
+        return True
+
+    def start_scene(self):
+        super().start_scene()
+        if self._processes > 1:
+            rect = self._boundary_rect
+            self._engine = TiledEngine(
+                self._world,
+                (rect.left, rect.right, rect.top, rect.bottom),
+                self._processes,
+            )
+
+    def end_scene(self):
+        super().end_scene()
+        if self._engine:
+            self._engine.close()
+            self._engine = None
+
+    def _step(self, delta_t):
+        if not self._engine:
+            super()._step(delta_t)
+            return
+        walls, hits = self._engine.step(delta_t, self._continuous)
+        self._play_effects(walls, hits)
+
+    def _spawn_balls(self):
+        """Place the balls on a jittered grid, one ball per grid cell."""
+        (width, height) = self._boundary_rect.size
+        count = self._num_balls
+        columns = ceil(sqrt(count * width / height))
+        rows = ceil(count / columns)
+        cell_width = width / columns
+        cell_height = height / rows
+        radius = sqrt(
+            StressBallsScene.fill_fraction * width * height / (count * np.pi)
+        )
+        radius = min(
+            Ball.default_radius,
+            radius,
+            0.45 * min(cell_width, cell_height),
+        )
+        radius = max(1.0, radius)
+
+        rng = np.random.default_rng()
+        cells = rng.choice(columns * rows, count, replace=False)
+        slack_x = max(cell_width / 2 - radius, 0)
+        slack_y = max(cell_height / 2 - radius, 0)
+        centers = np.column_stack(
+            (
+                (cells % columns + 0.5) * cell_width
+                + rng.uniform(-slack_x, slack_x, count),
+                (cells // columns + 0.5) * cell_height
+                + rng.uniform(-slack_y, slack_y, count),
+            )
+        )
+        velocities = rng.integers(1, 4, (count, 2)) * rng.choice(
+            (-1, 1), (count, 2)
+        )
+        self._world.add_many(
+            centers,
+            radius,
+            velocities,
+            rgbcolors.random_colors(count, rng),
+            rng.integers(5, 11, count),
+        )
+        self._world.bounce_counts[0] = 9999999
+        self._world.velocities[0] = (5, 5)
+
+    def _play_effects(self, walls, hits):
+        """Stress runs are silent and have no explosions."""
+
+    def _draw_balls(self, indices, centers, radii, colors):
+        if self._sprite_cache is not None or self._rasterizer is not None:
+            return super()._draw_balls(indices, centers, radii, colors)
+        return [
+            pygame.draw.circle(self._screen, color, center, radius)
+            for center, color, radius in zip(
+                centers.tolist(), colors.tolist(), radii.tolist()
+            )
+        ]
@@ -0,0 +1,81 @@
+# Moses Merugu
+# CPSC 386-03
+# 2022-05-09
+# mmeru@csu.fullerton.edu
+# @mmeru
+#
+# Lab 04-00
+#
+# Bounce with pygame!
+#
+"""Pre-rendered ball sprites.
+
+Rasterizing a circle with pygame.draw.circle for every ball every frame is
+slow. Instead every (radius, color) is drawn once, antialiased, into a
+small display format surface and the balls are blitted with one call to
+Surface.blits per frame."""
+
+from collections import OrderedDict
+from math import ceil
+import pygame
+import pygame.gfxdraw
+
+
+class BallSpriteCache:
+    """A bounded cache of ball surfaces keyed by (radius, color).
+
+    Random ball colors would grow the cache without limit, so the least
+    recently used sprites are evicted once it holds max_size sprites."""
+
+    def __init__(self, background_color, max_size=512):
+        """Initialize an empty cache. The sprites are antialiased against \
+            background_color, which is also their transparent colorkey."""
+        self._background_color = pygame.Color(background_color)
+        self._max_size = max_size
+        self._sprites = OrderedDict()
+
+    def __len__(self):
+        """Return the number of cached sprites."""
+        return len(self._sprites)
+
+    def _render(self, radius, color):
+        """Draw one antialiased ball in display format."""
+        size = 2 * ceil(radius) + 2
+        center = size // 2
+        sprite = pygame.Surface((size, size))
+        sprite.fill(self._background_color)
+        pixel_radius = max(1, round(radius))
+        pygame.gfxdraw.aacircle(sprite, center, center, pixel_radius, color)
+        pygame.gfxdraw.filled_circle(
+            sprite, center, center, pixel_radius, color
+        )
+        sprite.set_colorkey(self._background_color, pygame.RLEACCEL)
+        return sprite.convert()
+
+    def get(self, radius, color):
+        """Return the sprite of a ball of radius and color."""
+        key = (radius, tuple(color))
+        sprite = self._sprites.get(key)
+        if sprite is None:
+            sprite = self._render(radius, color)
+            self._sprites[key] = sprite
+            if len(self._sprites) > self._max_size:
+                self._sprites.popitem(last=False)
+        else:
+            self._sprites.move_to_end(key)
+        return sprite
+
+    def draw(self, surface, centers, radii, colors):
+        """Blit a ball at every center in one batch; return the Rects \
+            that were drawn over."""
+        batch = []
+        for center, radius, color in zip(centers, radii, colors):
+            sprite = self.get(radius, color)
+            offset = sprite.get_width() // 2
+            batch.append(
+                (
+                    sprite,
+                    (round(center[0]) - offset, round(center[1]) - offset),
+                )
+            )
+        return surface.blits(batch)
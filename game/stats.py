@@ -0,0 +1,249 @@
+# Moses Merugu
+# CPSC 386-03
+# 2022-05-09
+# mmeru@csu.fullerton.edu
+# @mmeru
+#
+# Lab 04-00
+#
+# Bounce with pygame!
+#
+"""Timing statistics for sizing hardware to a simulation."""
+
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+def _percentile(sorted_values, fraction):
+    """Return the value below which fraction of the sorted values fall."""
+    if not sorted_values:
+        return 0.0
+    position = round(fraction * (len(sorted_values) - 1))
+    return sorted_values[position]
+
+
+class FrameStats:
+    """Collect how long frames and simulation steps take."""
+
+    percentiles = (0.5, 0.9, 0.99)
+
+    def __init__(self):
+        """Initialize empty statistics."""
+        self._frame_times = []
+        self._step_times = []
+        self._start = None
+        self._stop = None
+
+    def start(self):
+        """Start the wall clock."""
+        self._start = time.perf_counter()
+        self._stop = None
+
+    def stop(self):
+        """Stop the wall clock."""
+        self._stop = time.perf_counter()
+
+    def record_step(self, seconds):
+        """Record how long one call to update_scene took."""
+        self._step_times.append(seconds)
+
+    def record_frame(self, seconds):
+        """Record how long one frame took, not counting the frame cap."""
+        self._frame_times.append(seconds)
+
+    @property
+    def steps(self):
+        """Return the number of simulation steps recorded."""
+        return len(self._step_times)
+
+    @property
+    def frames(self):
+        """Return the number of frames recorded."""
+        return len(self._frame_times)
+
+    @property
+    def elapsed(self):
+        """Return the wall clock seconds between start and stop."""
+        if self._start is None:
+            return 0.0
+        stop = self._stop if self._stop is not None else time.perf_counter()
+        return stop - self._start
+
+    def _summary(self, label, values):
+        """Return a line with the percentiles of values in milliseconds."""
+        values = sorted(values)
+        columns = [
+            f'p{round(fraction * 100)} '
+            f'{_percentile(values, fraction) * 1000:.2f} ms'
+            for fraction in FrameStats.percentiles
+        ]
+        worst = values[-1] * 1000 if values else 0.0
+        return f'{label}: ' + ', '.join(columns) + f', max {worst:.2f} ms'
+
+    def report(self):
+        """Return a human readable summary of the statistics."""
+        elapsed = self.elapsed
+        lines = [
+            f'{self.steps} steps and {self.frames} frames in {elapsed:.2f} s'
+        ]
+        if elapsed > 0:
+            lines.append(
+                f'Sustained {self.steps / elapsed:.1f} steps/s, '
+                f'{self.frames / elapsed:.1f} frames/s'
+            )
+        if self._step_times:
+            mean = sum(self._step_times) / len(self._step_times)
+            if mean > 0:
+                lines.append(f'Step capacity {1 / mean:.1f} steps/s')
+        lines.append(self._summary('Step time', self._step_times))
+        lines.append(self._summary('Frame time', self._frame_times))
+        return '\n'.join(lines)
+
+
+class AllocationCounter:
+    """Count the memory the per-frame methods of the balls allocate.
+
+    Use it as a context manager around each call of a Ball method made
+    every frame and call end_frame once a frame. It adds up the peak of
+    the memory each call allocates, which includes short-lived garbage,
+    and the memory blocks each call leaves behind. What a call hands back
+    to be kept, such as the Rect a ball was drawn in, is left out with
+    keep. Tracing slows Python down so only turn it on to measure."""
+
+    def __init__(self):
+        """Initialize an empty counter."""
+        self._allocated = []
+        self._retained = []
+        self._baseline = 0
+        self._blocks = 0
+        self._kept_bytes = 0
+        self._kept_blocks = 0
+        self._overhead = (0, 0)
+        self._frame_calls = 0
+        self._frame_allocated = 0
+        self._frame_retained = 0
+
+    def __enter__(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._measure_overhead()
+        self._kept_bytes = 0
+        self._kept_blocks = 0
+        self._blocks = sys.getallocatedblocks()
+        self._baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        blocks = sys.getallocatedblocks()
+        (_, peak) = tracemalloc.get_traced_memory()
+        (overhead_bytes, overhead_blocks) = self._overhead
+        self._frame_calls += 1
+        self._frame_allocated += max(
+            peak - self._baseline - self._kept_bytes - overhead_bytes, 0
+        )
+        self._frame_retained += (
+            blocks - self._blocks - self._kept_blocks - overhead_blocks
+        )
+
+    def _measure_overhead(self):
+        """Measure what an empty block counts, which is the counter's \
+            own doing, so it is taken off every block."""
+        for _ in range(3):
+            self._overhead = (0, 0)
+            with self:
+                pass
+            self._overhead = (self._frame_allocated, self._frame_retained)
+            self._frame_calls = 0
+            self._frame_allocated = 0
+            self._frame_retained = 0
+
+    def keep(self, result):
+        """Leave result out of the count of the call being measured; its \
+            caller keeps it on purpose."""
+        if result is not None:
+            self._kept_bytes += sys.getsizeof(result)
+            self._kept_blocks += 1
+
+    def end_frame(self):
+        """Record the calls measured since the last frame ended as one \
+            frame. Frames without calls are not counted."""
+        if self._frame_calls:
+            self._allocated.append(self._frame_allocated)
+            self._retained.append(self._frame_retained)
+        self._frame_calls = 0
+        self._frame_allocated = 0
+        self._frame_retained = 0
+
+    @property
+    def frames(self):
+        """Return the number of frames counted."""
+        return len(self._allocated)
+
+    def stop(self):
+        """End the last frame and stop tracing memory allocations."""
+        self.end_frame()
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def report(self):
+        """Return a human readable summary of the allocations."""
+        if not self._allocated:
+            return 'No frames counted'
+        allocated = sorted(self._allocated)
+        return (
+            f'{self.frames} frames: ball methods allocated per frame '
+            f'p50 {_percentile(allocated, 0.5)} bytes, '
+            f'max {allocated[-1]} bytes; '
+            f'{sum(self._retained) / self.frames:.1f} blocks kept per frame'
+        )
+
+
+class StartupProfile:
+    """Time the phases of starting the game up to its first frame.
+
+    Phases may nest, such as loading a font while a scene is built. The
+    time spent in a nested phase is only counted under its own name, so the
+    phases add up to the total."""
+
+    def __init__(self):
+        """Initialize a profile with no phases timed."""
+        self._seconds = {}
+        self._open = []
+
+    def begin(self, name):
+        """Start timing the phase name."""
+        self._open.append([name, time.perf_counter(), 0.0])
+
+    def end(self):
+        """Stop timing the phase begun last."""
+        (name, start, nested) = self._open.pop()
+        elapsed = time.perf_counter() - start
+        self._seconds[name] = self._seconds.get(name, 0.0) + elapsed - nested
+        if self._open:
+            self._open[-1][2] += elapsed
+
+    @contextmanager
+    def phase(self, name):
+        """Time the body of a with statement as the phase name."""
+        self.begin(name)
+        try:
+            yield self
+        finally:
+            self.end()
+
+    def report(self):
+        """Return a human readable breakdown of the phases."""
+        total = sum(self._seconds.values())
+        lines = [f'Startup took {total * 1000:.1f} ms']
+        for name, seconds in self._seconds.items():
+            share = seconds / total * 100 if total > 0 else 0.0
+            lines.append(f'{name}: {seconds * 1000:.1f} ms ({share:.0f}%)')
+        return '\n'.join(lines)
+
+
+# Loaders time themselves here whether or not anyone prints the profile;
+# it only costs a clock read per file loaded.
+startup_profile = StartupProfile()
@@ -0,0 +1,113 @@
+# Moses Merugu
+# CPSC 386-03
+# 2022-05-09
+# mmeru@csu.fullerton.edu
+# @mmeru
+#
+# Lab 04-00
+#
+# Bounce with pygame!
+#
+"""Shared fonts and rendered text.
+
+Loading a font reads and parses a TrueType file and rendering text runs the
+rasterizer, so neither belongs in a draw method that runs 60 times a
+second. Fonts are loaded once per (name, size) and rendered text is kept in
+a bounded cache keyed by (font, size, text, color)."""
+
+from collections import OrderedDict
+import pygame
+from game import rgbcolors
+from game.stats import startup_profile
+
+
+class FontRegistry:
+    """Load every font once and hand out the same Font afterwards."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._fonts = {}
+
+    def get(self, size, name=None):
+        """Return the font name at size. Without a name it is pygame's \
+            default font."""
+        key = (name, size)
+        font = self._fonts.get(key)
+        if font is None:
+            with startup_profile.phase('fonts'):
+                if not pygame.font.get_init():
+                    pygame.font.init()
+                font = pygame.font.Font(
+                    name if name else pygame.font.get_default_font(), size
+                )
+            self._fonts[key] = font
+        return font
+
+
+class TextCache:
+    """A bounded cache of rendered text surfaces.
+
+    The least recently used surfaces are evicted once it holds max_size
+    surfaces, so text that changes every frame cannot grow it without
+    limit."""
+
+    def __init__(self, fonts, max_size=256):
+        """Initialize an empty cache rendering with the fonts of a \
+            FontRegistry."""
+        self._fonts = fonts
+        self._max_size = max_size
+        self._surfaces = OrderedDict()
+
+    def __len__(self):
+        """Return the number of cached surfaces."""
+        return len(self._surfaces)
+
+    def render(self, text, size, color, name=None):
+        """Return text rendered antialiased in color with the font name \
+            at size."""
+        key = (name, size, text, tuple(color))
+        surface = self._surfaces.get(key)
+        if surface is None:
+            surface = self._fonts.get(size, name).render(text, True, color)
+            self._surfaces[key] = surface
+            if len(self._surfaces) > self._max_size:
+                self._surfaces.popitem(last=False)
+        else:
+            self._surfaces.move_to_end(key)
+        return surface
+
+
+class TintedText:
+    """Text rendered once as a glyph mask and recolored on demand.
+
+    The mask is the text in white with the antialiasing in its alpha
+    channel. Multiplying it by a color gives the same pixels as rendering
+    the text in that color, for the price of a copy and a fill."""
+
+    def __init__(self, text, size, name=None):
+        """Render the glyph mask of text with the font name at size."""
+        self._mask = render(text, size, rgbcolors.white, name)
+
+    def get_rect(self, **kwargs):
+        """Return the Rect of the text, placed like Surface.get_rect."""
+        return self._mask.get_rect(**kwargs)
+
+    def render(self, color):
+        """Return the text in color."""
+        surface = self._mask.copy()
+        surface.fill(color, special_flags=pygame.BLEND_RGBA_MULT)
+        return surface
+
+
+_fonts = FontRegistry()
+_text_cache = TextCache(_fonts)
+
+
+def font(size, name=None):
+    """Return the shared font name at size."""
+    return _fonts.get(size, name)
+
+
+def render(text, size, color, name=None):
+    """Return text rendered in color from the shared text cache."""
+    return _text_cache.render(text, size, color, name)
@@ -0,0 +1,654 @@
+# Moses Merugu
+# CPSC 386-03
+# 2022-05-09
+# mmeru@csu.fullerton.edu
+# @mmeru
+#
+# Lab 04-00
+#
+# Bounce with pygame!
+#
+"""Structure of arrays storage for the bouncing balls.
+
+Instead of every ball holding its own Vector2 objects, the state of all the
+balls lives in a handful of contiguous NumPy arrays. Ball and Circle objects
+are thin views that read and write one row of these arrays, while the scene
+moves every ball at once with a few array operations per frame."""
+
+import numpy as np
+from game import rgbcolors
+from game.broadphase import StaticIndex
+
+# Every color a channel value fades through to white, one row per tick of
+# the death fade; baked on the first fade.
+_fade_table = None
+
+
+class BallWorld:
+    """Contiguous arrays holding the state of every ball."""
+
+    # A dead ball fades from its own color to white over this many ticks.
+    death_fade_steps = 32
+
+    # The most times the balls stopped by an impact are swept again in one
+    # continuous step.
+    max_sweep_rounds = 4
+
+    def __init__(self, capacity=64):
+        """Initialize an empty world with room for capacity balls."""
+        capacity = max(1, capacity)
+        self._count = 0
+        self._centers = np.zeros((capacity, 2), dtype=np.float64)
+        self._velocities = np.zeros((capacity, 2), dtype=np.float64)
+        self._radii = np.zeros(capacity, dtype=np.float64)
+        self._colors = np.zeros((capacity, 3), dtype=np.uint8)
+        self._bounce_counts = np.zeros(capacity, dtype=np.int64)
+        self._alive = np.zeros(capacity, dtype=bool)
+        # Dead balls that have stopped are put to sleep: they are left out
+        # of the per-step work and only looked up, through a static index,
+        # by the balls that still move.
+        self._asleep = np.zeros(capacity, dtype=bool)
+        self._awake = None
+        self._static_index = None
+        # The awake balls the broadphase last indexed and their centers
+        # when they were indexed.
+        self._indexed = None
+        self._indexed_centers = None
+        # The dead balls still fading, how many steps each has faded and
+        # the color each started from.
+        self._fading = np.empty(0, dtype=np.intp)
+        self._fade_steps = np.empty(0, dtype=np.intp)
+        self._fade_from = np.empty((0, 3), dtype=np.uint8)
+
+    def __len__(self):
+        """Return the number of balls in the world."""
+        return self._count
+
+    def _grow(self):
+        """Double the capacity of every array."""
+        capacity = 2 * len(self._radii)
+        for name in (
+            "_centers",
+            "_velocities",
+            "_radii",
+            "_colors",
+            "_bounce_counts",
+            "_alive",
+            "_asleep",
+        ):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[: self._count] = old[: self._count]
+            setattr(self, name, new)
+
+    def add(
+        self,
+        center_x,
+        center_y,
+        radius,
+        velocity=(0, 0),
+        color=(0, 0, 0),
+        bounce_count=0,
+    ):
+        """Add a ball to the world and return its index."""
+        if self._count == len(self._radii):
+            self._grow()
+        index = self._count
+        self._count += 1
+        self._centers[index] = (center_x, center_y)
+        self._velocities[index] = velocity
+        self._radii[index] = radius
+        self._colors[index] = tuple(color)[:3]
+        self._bounce_counts[index] = bounce_count
+        self._alive[index] = True
+        self._asleep[index] = False
+        self._awake = None
+        self._static_index = None
+        return index
+
+    def add_many(self, centers, radii, velocities, colors, bounce_counts):
+        """Add a batch of balls to the world and return their indices."""
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+        count = len(centers)
+        while self._count + count > len(self._radii):
+            self._grow()
+        indices = np.arange(self._count, self._count + count)
+        self._count += count
+        self._centers[indices] = centers
+        self._velocities[indices] = velocities
+        self._radii[indices] = radii
+        self._colors[indices] = colors
+        self._bounce_counts[indices] = bounce_counts
+        self._alive[indices] = True
+        self._asleep[indices] = False
+        self._awake = None
+        self._static_index = None
+        return indices
+
+    # The properties below return views of the live part of each array.
+    # Writing through them changes the world; they are invalidated when
+    # the world grows, so do not hold on to them across calls to add().
+
+    @property
+    def centers(self):
+        """Return the (n, 2) array of ball centers."""
+        return self._centers[: self._count]
+
+    @property
+    def velocities(self):
+        """Return the (n, 2) array of ball velocities."""
+        return self._velocities[: self._count]
+
+    @property
+    def radii(self):
+        """Return the (n,) array of ball radii."""
+        return self._radii[: self._count]
+
+    @property
+    def colors(self):
+        """Return the (n, 3) array of RGB ball colors."""
+        return self._colors[: self._count]
+
+    @property
+    def bounce_counts(self):
+        """Return the (n,) array of bounces left before each ball dies."""
+        return self._bounce_counts[: self._count]
+
+    @property
+    def alive(self):
+        """Return the (n,) array of flags marking the living balls."""
+        return self._alive[: self._count]
+
+    @property
+    def asleep(self):
+        """Return the (n,) array of flags marking the sleeping balls."""
+        return self._asleep[: self._count]
+
+    @property
+    def awake(self):
+        """Return the indices of the balls that are not asleep."""
+        if self._awake is None:
+            self._awake = np.flatnonzero(~self.asleep)
+        return self._awake
+
+    def put_to_sleep(self):
+        """Put the dead balls that have stopped to sleep.
+
+        The static index over the sleeping balls is rebuilt only when a ball
+        is added, falls asleep or wakes up. Return true if it was rebuilt."""
+        awake = self.awake
+        stopped = ~self.alive[awake] & ~self.velocities[awake].any(axis=1)
+        if stopped.any():
+            self.asleep[awake[stopped]] = True
+            self._awake = None
+            self._static_index = None
+        if self._static_index is None:
+            sleeping = np.flatnonzero(self.asleep)
+            self._static_index = (
+                sleeping,
+                StaticIndex(self.centers[sleeping], self.radii[sleeping]),
+            )
+            return True
+        return False
+
+    def wake(self, indices):
+        """Wake up sleeping balls, for instance after setting their \
+            velocity."""
+        self.asleep[indices] = False
+        self._awake = None
+        self._static_index = None
+
+    def update(self, delta_t=1.0, indices=None):
+        """Move the balls at indices, or every ball, by their velocity \
+            times delta_t ticks."""
+        if indices is not None:
+            self.centers[indices] += self.velocities[indices] * delta_t
+            return
+        centers = self.centers
+        if delta_t == 1.0:
+            centers += self.velocities
+        else:
+            centers += self.velocities * delta_t
+
+    def wall_reflect(self, xmin, xmax, ymin, ymax, indices=None):
+        """Reflect the balls at indices, or every ball, that touch a wall; \
+            return their indices.
+
+        Only balls moving into a wall are reflected so a ball that is still
+        touching the wall after a short step does not flip back into it."""
+        if indices is None:
+            indices = np.arange(self._count)
+        centers = self.centers[indices]
+        radii = self.radii[indices]
+        velocities = self.velocities[indices]
+        hit_x = ((centers[:, 0] + radii >= xmax) & (velocities[:, 0] > 0)) | (
+            (centers[:, 0] - radii <= xmin) & (velocities[:, 0] < 0)
+        )
+        hit_y = ((centers[:, 1] - radii <= ymin) & (velocities[:, 1] < 0)) | (
+            (centers[:, 1] + radii >= ymax) & (velocities[:, 1] > 0)
+        )
+        velocities[hit_x, 0] *= -1
+        velocities[hit_y, 1] *= -1
+        self.velocities[indices] = velocities
+        return indices[hit_x | hit_y]
+
+    def kill(self, indices):
+        """Kill the given balls; they stop moving and fade to white."""
+        self.alive[indices] = False
+        self.velocities[indices] = 0
+        self.start_fade(indices)
+
+    def start_fade(self, indices):
+        """Start fading the balls at indices from their color to white."""
+        indices = np.asarray(indices, dtype=np.intp).reshape(-1)
+        self._fading = np.concatenate((self._fading, indices))
+        self._fade_steps = np.concatenate(
+            (self._fade_steps, np.zeros(len(indices), dtype=np.intp))
+        )
+        self._fade_from = np.concatenate(
+            (self._fade_from, self.colors[indices])
+        )
+
+    def advance_fades(self):
+        """Move every fading ball one tick closer to white. Call it once \
+            a tick however many steps the tick is split into."""
+        if not len(self._fading):
+            return
+        self._fade_steps += 1
+        self.colors[self._fading] = _death_fades()[
+            self._fade_steps[:, None] - 1, self._fade_from, np.arange(3)
+        ]
+        fading = self._fade_steps < BallWorld.death_fade_steps
+        self._fading = self._fading[fading]
+        self._fade_steps = self._fade_steps[fading]
+        self._fade_from = self._fade_from[fading]
+
+    def collide(self, first, second):
+        """Resolve every touching pair among the candidate pairs.
+
+        The candidates are two index arrays where (first[k], second[k]) is a
+        pair of balls that may be touching. All the pairs are tested in one
+        pass on squared distances. Touching balls are moved apart, reflected
+        about the line between their centers and lose one bounce. A ball in
+        several touching pairs is moved back as far as its deepest contact
+        needs and reflected once, about the sum of its contact normals, so
+        its speed never grows.
+
+        Return the index arrays of the touching pairs and the indices of the
+        balls that died."""
+        first = np.asarray(first, dtype=np.intp)
+        second = np.asarray(second, dtype=np.intp)
+        centers = self.centers
+        radii = self.radii
+
+        offset = centers[second] - centers[first]
+        squared_distance = np.einsum("ij,ij->i", offset, offset)
+        reach = radii[first] + radii[second]
+        hit = squared_distance <= reach * reach
+        first = first[hit]
+        second = second[hit]
+        if not len(first):
+            return first, second, np.empty(0, dtype=np.intp)
+        overlap = reach[hit] - np.sqrt(squared_distance[hit])
+        return first, second, self._resolve(first, second, overlap)
+
+    def _resolve(self, first, second, overlap):
+        """Separate, reflect and age the touching pairs; return the balls \
+            that died."""
+        centers = self.centers
+        velocities = self.velocities
+        alive = self.alive
+
+        balls = np.concatenate((first, second))
+        # Marking the balls is much faster than np.unique and as sorted.
+        touched = np.zeros(self._count, dtype=bool)
+        touched[balls] = True
+        touched = np.flatnonzero(touched)
+
+        # Move each ball back along its own velocity by half the overlap,
+        # twice as far when the other ball is dead and will not move. A
+        # ball in several pairs moves back as far as the deepest one needs.
+        half_distance = overlap / 2
+        back = np.zeros(self._count)
+        np.maximum.at(
+            back,
+            balls,
+            np.concatenate(
+                (
+                    np.where(alive[second], 1.0, 2.0) * half_distance,
+                    np.where(alive[first], 1.0, 2.0) * half_distance,
+                )
+            ),
+        )
+        centers[touched] -= velocities[touched] * back[touched, np.newaxis]
+
+        # Reflect every ball once about the sum of the directions to the
+        # balls it touches, which keeps its speed.
+        normal = centers[second] - centers[first]
+        length = np.sqrt(np.einsum("ij,ij->i", normal, normal))[:, np.newaxis]
+        np.divide(normal, length, out=normal, where=length > 0)
+        direction = np.zeros((self._count, 2))
+        np.add.at(direction, first, normal)
+        np.subtract.at(direction, second, normal)
+        direction = direction[touched]
+        length = np.sqrt(np.einsum("ij,ij->i", direction, direction))
+        length = length[:, np.newaxis]
+        np.divide(direction, length, out=direction, where=length > 0)
+        before = velocities[touched]
+        along = np.einsum("ij,ij->i", before, direction)
+        velocities[touched] = before - direction * (2 * along)[:, np.newaxis]
+
+        bounce_counts = self.bounce_counts
+        np.subtract.at(bounce_counts, first, 1)
+        np.subtract.at(bounce_counts, second, 1)
+        dying = np.flatnonzero(alive & (bounce_counts <= 0))
+        self.kill(dying)
+        return dying
+
+    def _path_circles(self, spans, indices, bounds):
+        """Return the centers and reaches of circles holding every place \
+            the center of each ball at indices goes while it moves spans \
+            ticks, bouncing off the walls of bounds.
+
+        Bouncing folds the straight path of a ball at the walls, and
+        folding never moves two points further apart, so the circle is
+        centered on the folded middle of the path and reaches half its
+        length. A ball that starts past a wall reaches further by how far
+        it is past the wall."""
+        centers = self.centers[indices]
+        radii = self.radii[indices]
+        paths = self.velocities[indices] * spans[indices, np.newaxis]
+        (xmin, xmax, ymin, ymax) = bounds
+        low = np.stack((xmin + radii, ymin + radii), axis=1)
+        high = np.stack((xmax - radii, ymax - radii), axis=1)
+        past = _fold(centers, low, high) - centers
+        reach = np.sqrt(np.einsum("ij,ij->i", paths, paths)) / 2
+        reach += np.sqrt(np.einsum("ij,ij->i", past, past))
+        return _fold(centers + paths / 2, low, high), reach
+
+    def time_of_impact(self, first, second, spans):
+        """Return when each candidate pair first touches, as a fraction \
+            from 0 to 1 of the step.
+
+        spans holds the ticks every ball in the world moves during the
+        step, 0 for a ball that stands still. Both balls are swept along
+        their paths and the moment their distance equals the sum of their
+        radii is solved for. Pairs that already touch and are closing get
+        0 and pairs that do not meet during the step get infinity."""
+        paths = self.velocities * spans[:, np.newaxis]
+        radii = self.radii
+        offset = np.take(self.centers, second, axis=0) - np.take(
+            self.centers, first, axis=0
+        )
+        closing = np.take(paths, second, axis=0) - np.take(
+            paths, first, axis=0
+        )
+        reach = radii[first] + radii[second]
+        # |offset + closing * t| = reach is a quadratic a t^2 + b t + c = 0.
+        quad_a = np.einsum("ij,ij->i", closing, closing)
+        quad_b = 2 * np.einsum("ij,ij->i", offset, closing)
+        quad_c = np.einsum("ij,ij->i", offset, offset) - reach * reach
+        discriminant = quad_b * quad_b - 4 * quad_a * quad_c
+        approaching = (quad_b < 0) & (quad_a > 0) & (discriminant >= 0)
+        toi = np.full(len(first), np.inf)
+        np.divide(
+            -quad_b - np.sqrt(np.maximum(discriminant, 0)),
+            2 * quad_a,
+            out=toi,
+            where=approaching,
+        )
+        toi[~approaching] = np.inf
+        toi[toi > 1] = np.inf
+        toi[approaching & (quad_c <= 0)] = 0
+        return toi
+
+    def sweep(self, spans, first, second, bounds, circles):
+        """Move the balls along their paths, stopping each at its \
+            earliest impact.
+
+        spans holds the ticks every ball in the world moves, 0 for the
+        balls that stand still. The candidate pairs are swept to their
+        times of impact and the earliest impact of every ball, with
+        another ball or with a wall of bounds, is picked for all the balls
+        at once. A pair is resolved at the moment of contact when that
+        impact is the earliest for both of its balls; a ball whose
+        earliest impact was with a ball that turned away first is only
+        stopped there. circles holds the centers and reaches of a circle
+        around every ball, and a ball that would leave its circle stops at
+        the edge for the rest of the step.
+
+        Return the index arrays of the pairs that hit, the indices of the
+        balls that died, the indices of the balls that hit a wall and the
+        ticks each ball has left."""
+        first = np.asarray(first, dtype=np.intp)
+        second = np.asarray(second, dtype=np.intp)
+        movers = np.flatnonzero(spans)
+        centers = self.centers
+        velocities = self.velocities
+        position = np.take(centers, movers, axis=0)
+        moving = np.take(velocities, movers, axis=0)
+        paths = moving * spans[movers, np.newaxis]
+        wall_t = _time_to_walls(position, paths, self.radii[movers], bounds)
+        (middles, reach) = circles
+        leave_t = _time_in_circle(
+            position - np.take(middles, movers, axis=0), paths, reach[movers]
+        )
+
+        earliest = np.full(self._count, np.inf)
+        earliest[movers] = np.minimum(
+            np.minimum(wall_t.min(axis=1), leave_t), 1.0
+        )
+        toi = self.time_of_impact(first, second, spans)
+        np.minimum.at(earliest, first, toi)
+        np.minimum.at(earliest, second, toi)
+        hit = (
+            np.isfinite(toi)
+            & (toi == earliest[first])
+            & (toi == earliest[second])
+        )
+        first = first[hit]
+        second = second[hit]
+
+        # Move every ball as far as its earliest impact or its whole path.
+        done = earliest[movers]
+        centers[movers] = position + paths * done[:, np.newaxis]
+        left = np.zeros(self._count)
+        left[movers] = np.where(leave_t <= done, 0, (1 - done) * spans[movers])
+        bounce = wall_t <= done[:, np.newaxis]
+        moving[bounce] *= -1
+        velocities[movers] = moving
+        # The balls meet at the moment of contact, so they are only
+        # reflected; a pair that already overlapped moves apart from here.
+        dying = np.empty(0, dtype=np.intp)
+        if len(first):
+            dying = self._resolve(first, second, np.zeros(len(first)))
+        return first, second, dying, movers[bounce.any(axis=1)], left
+
+    def _candidates(self, broadphase, awake, centers, radii):
+        """Return the pairs of balls that may touch: pairs of awake balls \
+            from the broadphase and awake balls near sleeping balls from \
+            the static index. The awake balls are given as circles with \
+            the centers and radii."""
+        first, second = broadphase.pairs(centers, radii)
+        # A ball is indexed before it is pushed apart from the balls it
+        # hit, or, in a continuous step, halfway along its path; query_rect
+        # measures how far the balls went since.
+        self._indexed = awake
+        self._indexed_centers = centers
+        first = awake[first]
+        second = awake[second]
+        (sleeping, static_index) = self._static_index
+        if len(static_index):
+            mover, sleeper = static_index.query(centers, radii)
+            first = np.concatenate((first, awake[mover]))
+            second = np.concatenate((second, sleeping[sleeper]))
+        return first, second
+
+    def step(self, delta_t, broadphase, bounds, continuous=False):
+        """Advance the world delta_t ticks inside bounds.
+
+        The bounds are (xmin, xmax, ymin, ymax). Pairs come from the
+        broadphase and are resolved discretely, or swept to their time of
+        impact when continuous is true. Only awake balls are moved and given
+        to the broadphase, so the work per step grows with the number of
+        balls still moving.
+
+        Return the indices of the balls that hit a wall and the index
+        arrays of the pairs that hit each other."""
+        if self.put_to_sleep():
+            # The awake balls changed so the broadphase sees other balls.
+            broadphase.reset()
+        awake = self.awake
+        if continuous:
+            return self._sweep_step(delta_t, broadphase, bounds, awake)
+        # Update position for all balls
+        self.update(delta_t, awake)
+        # Check if a ball passes the walls
+        walls = self.wall_reflect(*bounds, indices=awake)
+        # Check (pairwise) if the ball collides, if so bounce
+        first, second = self._candidates(
+            broadphase, awake, self.centers[awake], self.radii[awake]
+        )
+        first, second, _ = self.collide(first, second)
+        return walls, first, second
+
+    def _sweep_step(self, delta_t, broadphase, bounds, awake):
+        """Advance the awake balls delta_t ticks with continuous collisions.
+
+        The broadphase runs once, on circles holding the path of every
+        ball over the whole step. A ball stopped by an impact is swept
+        again for the rest of its step along its new velocity, up to
+        max_sweep_rounds times, against the same pairs; the balls that
+        were not stopped have finished moving. The pairs only cover the
+        circles, so a ball stops where it would leave its circle and a
+        ball still stopped after the last round stays where it is; no ball
+        ever takes a path that was not tested."""
+        spans = np.zeros(self._count)
+        spans[awake] = delta_t
+        middles = np.zeros((self._count, 2))
+        reach = np.zeros(self._count)
+        (middles[awake], reach[awake]) = self._path_circles(
+            spans, awake, bounds
+        )
+        first, second = self._candidates(
+            broadphase, awake, middles[awake], self.radii[awake] + reach[awake]
+        )
+        found = []
+        for _ in range(BallWorld.max_sweep_rounds):
+            (hit_first, hit_second, _, walls, spans) = self.sweep(
+                spans, first, second, bounds, (middles, reach)
+            )
+            found.append((walls, hit_first, hit_second))
+            if not spans.any():
+                break
+            # Only the pairs with a ball still moving can meet again.
+            keep = (spans[first] > 0) | (spans[second] > 0)
+            first = first[keep]
+            second = second[keep]
+        (walls, first, second) = (
+            np.concatenate(arrays) for arrays in zip(*found)
+        )
+        return np.unique(walls), first, second
+
+    def query_rect(self, left, top, right, bottom, broadphase=None):
+        """Return the sorted indices of the balls whose bounding boxes \
+            meet the rect from (left, top) to (right, bottom).
+
+        The awake balls are looked up in the grid broadphase built during
+        the last step and the sleeping balls in the static index, so the
+        work grows with the number of balls near the rect. If broadphase
+        keeps no grid or the balls changed since the last step, every
+        ball is tested."""
+        candidates = None
+        if (
+            broadphase is not None
+            and self._indexed is not None
+            and self._indexed is self._awake
+            and self._static_index is not None
+        ):
+            # Widen the rect by the furthest any ball moved since it was
+            # indexed and by the largest radius.
+            indexed = self._indexed
+            moved = np.abs(self.centers[indexed] - self._indexed_centers)
+            reach = moved.max(initial=0) + self.radii[indexed].max(initial=0)
+            local = broadphase.query_rect(
+                left - reach, top - reach, right + reach, bottom + reach
+            )
+            if local is not None:
+                (sleeping, static_index) = self._static_index
+                candidates = np.concatenate(
+                    (
+                        self._indexed[local],
+                        sleeping[
+                            static_index.query_rect(left, top, right, bottom)
+                        ],
+                    )
+                )
+        if candidates is None:
+            candidates = np.arange(self._count)
+        centers = self.centers[candidates]
+        radii = self.radii[candidates]
+        keep = (
+            (centers[:, 0] + radii >= left)
+            & (centers[:, 0] - radii <= right)
+            & (centers[:, 1] + radii >= top)
+            & (centers[:, 1] - radii <= bottom)
+        )
+        return np.sort(candidates[keep])
+
+
+def _death_fades():
+    """Return the (death_fade_steps, 256, 3) table of the colors each \
+        channel value fades through to white, baking it the first time."""
+    global _fade_table  # pylint: disable=global-statement
+    if _fade_table is None:
+        steps = BallWorld.death_fade_steps
+        _fade_table = rgbcolors.lerp_colors(
+            np.arange(256)[:, None],
+            rgbcolors.white,
+            (np.arange(1, steps + 1) / steps)[:, None],
+        )
+    return _fade_table
+
+
+def _fold(points, low, high):
+    """Fold points that went past low or high back inside, as many times \
+        as it takes, like a ball bouncing between two walls."""
+    width = np.maximum(high - low, 1e-9)
+    folded = np.mod(points - low, 2 * width)
+    return low + np.where(folded > width, 2 * width - folded, folded)
+
+
+def _time_to_walls(position, paths, radii, bounds):
+    """Return how far, as a fraction of each path, a ball at position \
+        with radii goes along paths before it touches the wall of bounds \
+        it is heading for, in x and in y; 0 for a ball already past it."""
+    (xmin, xmax, ymin, ymax) = bounds
+    radii = radii[:, np.newaxis]
+    wall = np.where(
+        paths > 0,
+        np.array((xmax, ymax)) - radii,
+        np.array((xmin, ymin)) + radii,
+    )
+    time = np.full(paths.shape, np.inf)
+    np.divide(wall - position, paths, out=time, where=paths != 0)
+    return np.maximum(time, 0)
+
+
+def _time_in_circle(offsets, paths, reach):
+    """Return how far, as a fraction of each path, a point offsets from the \
+        center of a circle of radius reach can go along paths before it \
+        leaves the circle; infinity for a point that does not move."""
+    # |offset + path * t| = reach is a quadratic a t^2 + b t + c = 0.
+    quad_a = np.einsum("ij,ij->i", paths, paths)
+    quad_b = 2 * np.einsum("ij,ij->i", offsets, paths)
+    quad_c = np.einsum("ij,ij->i", offsets, offsets) - reach * reach
+    discriminant = np.maximum(quad_b * quad_b - 4 * quad_a * quad_c, 0)
+    time = np.full(len(paths), np.inf)
+    np.divide(
+        -quad_b + np.sqrt(discriminant),
+        2 * quad_a,
+        out=time,
+        where=quad_a > 0,
+    )
+    return np.maximum(time, 0)